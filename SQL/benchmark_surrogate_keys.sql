@@ -0,0 +1,164 @@
+-- BENCHMARK: string keys vs integer surrogate keys
+-- Builds both key layouts side by side in a scratch schema with the same synthetic data,
+-- then compares index sizes, the cost of the Room/Hotel/HotelChain join used by
+-- search_rooms and the HotelRoomCapacity view, and the search_rooms query the ORM sends.
+-- Drops everything it created at the end.
+--     psql -d hotel_management -f SQL/benchmark_surrogate_keys.sql
+
+\set hotels 20000
+\set rooms_per_hotel 50
+\timing on
+
+DROP SCHEMA IF EXISTS key_benchmark CASCADE;
+CREATE SCHEMA key_benchmark;
+SET search_path TO key_benchmark;
+
+/* String keys (previous layout) */
+
+CREATE TABLE chain_by_name (
+    chainName VARCHAR(255) PRIMARY KEY
+);
+
+CREATE TABLE hotel_by_address (
+    address VARCHAR(255) PRIMARY KEY,
+    rating INT,
+    chainName VARCHAR(255) NOT NULL REFERENCES chain_by_name (chainName)
+);
+
+CREATE TABLE room_by_address (
+    roomNumber INT PRIMARY KEY,
+    price FLOAT,
+    capacity INT,
+    hotelAddress VARCHAR(255) NOT NULL REFERENCES hotel_by_address (address)
+);
+
+/* Integer surrogate keys (current layout) */
+
+CREATE TABLE chain_by_id (
+    chainID SERIAL PRIMARY KEY,
+    chainName VARCHAR(255) UNIQUE NOT NULL
+);
+
+CREATE TABLE hotel_by_id (
+    hotelID SERIAL PRIMARY KEY,
+    address VARCHAR(255) UNIQUE NOT NULL,
+    rating INT,
+    chainID INT NOT NULL REFERENCES chain_by_id (chainID)
+);
+
+CREATE TABLE room_by_id (
+    roomNumber INT PRIMARY KEY,
+    price FLOAT,
+    capacity INT,
+    hotelID INT NOT NULL REFERENCES hotel_by_id (hotelID)
+);
+
+/* Same data in both; addresses are realistic length (~40 chars) */
+
+INSERT INTO chain_by_name
+SELECT 'Hotel Chain International Number ' || n FROM generate_series(1, 50) n;
+INSERT INTO chain_by_id (chainName)
+SELECT chainName FROM chain_by_name ORDER BY chainName;
+
+INSERT INTO hotel_by_address
+SELECT n || ' Some Fairly Long Street Name, City ' || (n % 500), 1 + n % 5,
+       'Hotel Chain International Number ' || (1 + n % 50)
+FROM generate_series(1, :hotels) n;
+INSERT INTO hotel_by_id (address, rating, chainID)
+SELECT hotel_by_address.address, hotel_by_address.rating, chain_by_id.chainID
+FROM hotel_by_address
+JOIN chain_by_id ON chain_by_id.chainName = hotel_by_address.chainName
+ORDER BY hotel_by_address.address;
+
+INSERT INTO room_by_address
+SELECT n, 50 + n % 400, 1 + n % 6,
+       (1 + n % :hotels) || ' Some Fairly Long Street Name, City ' || ((1 + n % :hotels) % 500)
+FROM generate_series(1, :hotels * :rooms_per_hotel) n;
+INSERT INTO room_by_id
+SELECT room_by_address.roomNumber, room_by_address.price, room_by_address.capacity, hotel_by_id.hotelID
+FROM room_by_address
+JOIN hotel_by_id ON hotel_by_id.address = room_by_address.hotelAddress;
+
+CREATE INDEX ON hotel_by_address (chainName);
+CREATE INDEX ON room_by_address (hotelAddress);
+CREATE INDEX ON hotel_by_id (chainID);
+CREATE INDEX ON room_by_id (hotelID);
+
+VACUUM ANALYZE chain_by_name, hotel_by_address, room_by_address, chain_by_id, hotel_by_id, room_by_id;
+
+/* Index size */
+
+SELECT indexrelid::regclass AS index_name,
+       pg_size_pretty(pg_relation_size(indexrelid)) AS size
+FROM pg_index
+WHERE indrelid IN ('hotel_by_address'::regclass, 'room_by_address'::regclass,
+                   'hotel_by_id'::regclass, 'room_by_id'::regclass)
+ORDER BY indrelid::regclass::text, index_name::text;
+
+SELECT 'string keys' AS layout,
+       pg_size_pretty(pg_indexes_size('hotel_by_address') + pg_indexes_size('room_by_address')) AS index_size,
+       pg_size_pretty(pg_table_size('hotel_by_address') + pg_table_size('room_by_address')) AS table_size
+UNION ALL
+SELECT 'integer keys',
+       pg_size_pretty(pg_indexes_size('hotel_by_id') + pg_indexes_size('room_by_id')),
+       pg_size_pretty(pg_table_size('hotel_by_id') + pg_table_size('room_by_id'));
+
+/* Join cost: HotelRoomCapacity-style aggregate over the whole inventory */
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT hotel_by_address.address, chain_by_name.chainName, COUNT(*), SUM(room_by_address.capacity)
+FROM hotel_by_address
+JOIN chain_by_name ON chain_by_name.chainName = hotel_by_address.chainName
+JOIN room_by_address ON room_by_address.hotelAddress = hotel_by_address.address
+GROUP BY hotel_by_address.address, chain_by_name.chainName;
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT hotel_by_id.address, chain_by_id.chainName, COUNT(*), SUM(room_by_id.capacity)
+FROM hotel_by_id
+JOIN chain_by_id ON chain_by_id.chainID = hotel_by_id.chainID
+JOIN room_by_id ON room_by_id.hotelID = hotel_by_id.hotelID
+GROUP BY hotel_by_id.hotelID, hotel_by_id.address, chain_by_id.chainName;
+
+/* Join cost: search_rooms-style filter on chain and rating */
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT room_by_address.*
+FROM room_by_address
+JOIN hotel_by_address ON hotel_by_address.address = room_by_address.hotelAddress
+WHERE hotel_by_address.chainName = 'Hotel Chain International Number 7'
+AND hotel_by_address.rating = 2
+AND room_by_address.capacity >= 2;
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT room_by_id.*
+FROM room_by_id
+JOIN hotel_by_id ON hotel_by_id.hotelID = room_by_id.hotelID
+WHERE hotel_by_id.chainID = (SELECT chainID FROM chain_by_id WHERE chainName = 'Hotel Chain International Number 7')
+AND hotel_by_id.rating = 2
+AND room_by_id.capacity >= 2;
+
+/* search_rooms as the ORM issues it (SQLAlchemy, rendered with the postgresql dialect) */
+
+-- Previous models: Room.hoteladdress as a column_property, i.e. a correlated subquery
+-- run per returned room on top of the join
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT (SELECT hotel_by_id.address FROM hotel_by_id WHERE hotel_by_id.hotelID = room_by_id.hotelID) AS anon_1,
+       room_by_id.roomNumber, room_by_id.price, room_by_id.capacity, room_by_id.hotelID
+FROM room_by_id
+JOIN hotel_by_id ON hotel_by_id.hotelID = room_by_id.hotelID
+WHERE hotel_by_id.chainID = (SELECT chainID FROM chain_by_id WHERE chainName = 'Hotel Chain International Number 7')
+AND hotel_by_id.rating = 2
+AND room_by_id.capacity >= 2;
+
+-- Current models: Room.hotel loaded with contains_eager, so the address comes from the join
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT hotel_by_id.hotelID, hotel_by_id.address, hotel_by_id.rating, hotel_by_id.chainID,
+       room_by_id.roomNumber, room_by_id.price, room_by_id.capacity, room_by_id.hotelID AS hotelid_1
+FROM room_by_id
+JOIN hotel_by_id ON hotel_by_id.hotelID = room_by_id.hotelID
+WHERE hotel_by_id.chainID = (SELECT chainID FROM chain_by_id WHERE chainName = 'Hotel Chain International Number 7')
+AND hotel_by_id.rating = 2
+AND room_by_id.capacity >= 2;
+
+RESET search_path;
+DROP SCHEMA key_benchmark CASCADE;
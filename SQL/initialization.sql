@@ -1,22 +1,26 @@
+-- Hotels and chains are keyed by compact integer surrogates; address and chainName
+-- stay unique so the API can keep looking them up by those.
 CREATE TABLE IF NOT EXISTS HotelChain (
+    chainID SERIAL,
     chainName VARCHAR(255) UNIQUE NOT NULL,
     address VARCHAR(255),
     numberOfHotels INT CHECK (numberOfHotels >= 0),
     contactEmail VARCHAR(255),
     phoneNumber VARCHAR(20),
-    PRIMARY KEY (chainName)
+    PRIMARY KEY (chainID)
 );
 
 CREATE TABLE IF NOT EXISTS Hotel (
+    hotelID SERIAL,
     address VARCHAR(255) UNIQUE NOT NULL,
     contactEmail VARCHAR(255),
     phoneNumber VARCHAR(20),
     numberOfRooms INT CHECK (numberOfRooms >= 0),
     rating INT CHECK (rating BETWEEN 1 AND 5),
-    chainName VARCHAR(255) NOT NULL,
+    chainID INT NOT NULL,
 	managerID TEXT UNIQUE,
-    PRIMARY KEY (address),
-    FOREIGN KEY (chainName) REFERENCES HotelChain (chainName) ON DELETE CASCADE
+    PRIMARY KEY (hotelID),
+    FOREIGN KEY (chainID) REFERENCES HotelChain (chainID) ON DELETE CASCADE
 );
 
 CREATE TABLE IF NOT EXISTS Room (
@@ -27,10 +31,10 @@ CREATE TABLE IF NOT EXISTS Room (
     extendable BOOLEAN, -- boolean because it's a yes or no
     viewType VARCHAR(255),
     capacity INT,
-    hotelAddress VARCHAR(255) NOT NULL,
+    hotelID INT NOT NULL,
     PRIMARY KEY (roomNumber),
-    FOREIGN KEY (hotelAddress) REFERENCES Hotel (address) ON DELETE CASCADE,
-    UNIQUE (roomNumber, hotelAddress)
+    FOREIGN KEY (hotelID) REFERENCES Hotel (hotelID) ON DELETE CASCADE,
+    UNIQUE (roomNumber, hotelID)
 );
 
 CREATE TABLE IF NOT EXISTS Employee (
@@ -38,7 +42,7 @@ CREATE TABLE IF NOT EXISTS Employee (
 	fullName VARCHAR(255),
 	address VARCHAR(255),
 	jobPosition VARCHAR(255), -- changed from position to jobPosition as `position` seems to be a keyword in SQL
-	hotelID VARCHAR(255) NOT NULL,
+	hotelID INT NOT NULL,
 	PRIMARY KEY (SSN)
 );
 
@@ -50,38 +54,62 @@ CREATE TABLE IF NOT EXISTS Customer (
 	PRIMARY KEY (customerID)
 );
 
+-- Booking and Renting are range-partitioned by startDate, one partition per month.
+-- The partition key has to be part of the primary key, and stays are capped at 365 days
+-- so that availability checks can bound startDate from below and prune old partitions.
 CREATE TABLE IF NOT EXISTS Booking (
 	bookingID SERIAL,
-	startDate TIMESTAMPTZ,
-	endDate TIMESTAMPTZ,
+	startDate TIMESTAMPTZ NOT NULL,
+	endDate TIMESTAMPTZ NOT NULL,
 	roomNumber INT NOT NULL,
 	customerID VARCHAR(255) NOT NULL,
-	PRIMARY KEY (bookingID),
+	PRIMARY KEY (bookingID, startDate),
+	CHECK (endDate >= startDate AND endDate - startDate <= INTERVAL '365 days'),
 	FOREIGN KEY (roomNumber) REFERENCES Room (roomNumber) ON DELETE CASCADE,
 	FOREIGN KEY (customerID) REFERENCES Customer (customerID) ON DELETE CASCADE
-);
+) PARTITION BY RANGE (startDate);
 
+-- bookingID is not unique on its own across partitions, so Renting.bookingID cannot be a
+-- real foreign key; it is enforced by the booking_reference triggers below instead.
 CREATE TABLE IF NOT EXISTS Renting (
 	rentingID SERIAL,
 	paymentInformation VARCHAR(255),
-	startDate TIMESTAMPTZ,
-	endDate TIMESTAMPTZ,
+	startDate TIMESTAMPTZ NOT NULL,
+	endDate TIMESTAMPTZ NOT NULL,
 	employeeID TEXT NOT NULL,
 	customerID VARCHAR(255) NOT NULL,
 	roomNumber INT NOT NULL,
 	bookingID INT,
-	PRIMARY KEY (rentingID),
+	PRIMARY KEY (rentingID, startDate),
+	CHECK (endDate >= startDate AND endDate - startDate <= INTERVAL '365 days'),
 	FOREIGN KEY (employeeID) REFERENCES Employee (SSN) ON DELETE SET NULL,
 	FOREIGN KEY (customerID) REFERENCES Customer (customerID) ON DELETE CASCADE,
-	FOREIGN KEY (roomNumber) REFERENCES Room (roomNumber) ON DELETE CASCADE,
-	FOREIGN KEY (bookingID) REFERENCES Booking (bookingID) ON DELETE SET NULL
-);
+	FOREIGN KEY (roomNumber) REFERENCES Room (roomNumber) ON DELETE CASCADE
+) PARTITION BY RANGE (startDate);
+
+-- Rows outside every monthly partition land here until create_stay_partitions moves them
+CREATE TABLE IF NOT EXISTS Booking_default PARTITION OF Booking DEFAULT;
+CREATE TABLE IF NOT EXISTS Renting_default PARTITION OF Renting DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_booking_room_dates ON Booking (roomNumber, startDate, endDate);
+CREATE INDEX IF NOT EXISTS idx_renting_room_dates ON Renting (roomNumber, startDate, endDate);
+CREATE INDEX IF NOT EXISTS idx_booking_id ON Booking (bookingID);
+CREATE INDEX IF NOT EXISTS idx_renting_booking ON Renting (bookingID);
+-- Customer stay history (GET /customers/{id}/history) loads stays by customer, oldest first
+CREATE INDEX IF NOT EXISTS idx_booking_customer_start ON Booking (customerID, startDate);
+CREATE INDEX IF NOT EXISTS idx_renting_customer_start ON Renting (customerID, startDate);
+
+CREATE SCHEMA IF NOT EXISTS archive;
 
 ALTER TABLE Hotel 
 ADD FOREIGN KEY (managerID) REFERENCES Employee (SSN) ON DELETE SET NULL;
 
 ALTER TABLE Employee
-ADD FOREIGN KEY (hotelID) REFERENCES Hotel (address) ON DELETE SET NULL;
+ADD FOREIGN KEY (hotelID) REFERENCES Hotel (hotelID) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_hotel_chain ON Hotel (chainID);
+CREATE INDEX IF NOT EXISTS idx_room_hotel ON Room (hotelID);
+CREATE INDEX IF NOT EXISTS idx_employee_hotel ON Employee (hotelID);
 
 /* TRIGGER AND FUNCTION DEFINITIONS */
 
@@ -91,7 +119,7 @@ BEGIN
 	IF NEW.jobPosition = 'Manager' THEN
 		UPDATE Hotel
 		SET managerID = NEW.SSN
-		WHERE address = NEW.hotelID;
+		WHERE hotelID = NEW.hotelID;
 	END IF;
 	RETURN NEW;
 END;
@@ -109,8 +137,9 @@ BEGIN
 	SET numberOfHotels = (
 		SELECT COUNT(*)
 		FROM Hotel currentHotel
-		WHERE currentHotel.chainName = NEW.chainName
-	);
+		WHERE currentHotel.chainID = NEW.chainID
+	)
+	WHERE chainID = NEW.chainID;
 	RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -120,6 +149,119 @@ AFTER INSERT ON HOTEL
 FOR EACH ROW
 EXECUTE FUNCTION calculate_hotel_count();
 
+/* PARTITION MAINTENANCE */
+
+-- Create the monthly Booking and Renting partitions covering from_month..to_month.
+-- Already existing partitions are skipped, and rows that had fallen into the default
+-- partition for a newly created month are moved into it. Concurrent callers (e.g. several
+-- workers starting at once) are serialized on an advisory lock.
+CREATE OR REPLACE FUNCTION create_stay_partitions(from_month DATE, to_month DATE)
+RETURNS VOID AS $$
+DECLARE
+	parent TEXT;
+	month_start DATE;
+	month_end DATE;
+	partition_name TEXT;
+BEGIN
+	PERFORM pg_advisory_xact_lock(hashtext('create_stay_partitions'));
+	FOREACH parent IN ARRAY ARRAY['booking', 'renting'] LOOP
+		month_start := date_trunc('month', from_month)::date;
+		WHILE month_start <= to_month LOOP
+			month_end := (month_start + INTERVAL '1 month')::date;
+			partition_name := parent || '_p' || to_char(month_start, 'YYYY_MM');
+			IF to_regclass(partition_name) IS NULL THEN
+				EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+					partition_name, parent);
+				-- While moved rows sit in the not yet attached table, clear_renting_booking
+				-- would not find them and must not treat the DELETE as a real one
+				PERFORM set_config('stay_partitions.moving', 'on', true);
+				EXECUTE format('WITH moved AS (DELETE FROM %I WHERE startDate >= %L AND startDate < %L RETURNING *)
+					INSERT INTO %I SELECT * FROM moved',
+					parent || '_default', month_start, month_end, partition_name);
+				PERFORM set_config('stay_partitions.moving', 'off', true);
+				EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+					parent, partition_name, month_start, month_end);
+			END IF;
+			month_start := month_end;
+		END LOOP;
+	END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach every monthly partition that ended more than `retention` ago and move it into
+-- the archive schema. Returns the names of the archived partitions.
+-- DETACH does not fire clear_renting_booking, so before a Booking partition goes, rentings
+-- still in the live table that point into it get their bookingID cleared, as a DELETE would.
+-- Renting partitions are archived first, so archived rentings keep their references to
+-- the archived bookings.
+CREATE OR REPLACE FUNCTION archive_stay_partitions(retention INTERVAL)
+RETURNS SETOF TEXT AS $$
+DECLARE
+	part RECORD;
+BEGIN
+	FOR part IN
+		SELECT parent.relname AS parent_name, child.relname AS partition_name
+		FROM pg_inherits
+		JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+		JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+		WHERE parent.relname IN ('booking', 'renting')
+		AND child.relname ~ '_p[0-9]{4}_[0-9]{2}$'
+		AND to_date(right(child.relname, 7), 'YYYY_MM') + INTERVAL '1 month'
+			<= date_trunc('month', CURRENT_DATE) - retention
+		ORDER BY parent.relname DESC, child.relname
+	LOOP
+		IF part.parent_name = 'booking' THEN
+			EXECUTE format('UPDATE Renting SET bookingID = NULL WHERE bookingID IN (SELECT bookingID FROM %I)',
+				part.partition_name);
+		END IF;
+		EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', part.parent_name, part.partition_name);
+		EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part.partition_name);
+		RETURN NEXT part.partition_name;
+	END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stand-in for FOREIGN KEY (bookingID) REFERENCES Booking (bookingID)
+CREATE OR REPLACE FUNCTION check_renting_booking()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF NEW.bookingID IS NOT NULL AND NOT EXISTS (
+		SELECT 1 FROM Booking WHERE bookingID = NEW.bookingID
+	) THEN
+		RAISE EXCEPTION 'Booking % does not exist', NEW.bookingID
+			USING ERRCODE = 'foreign_key_violation';
+	END IF;
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER check_renting_booking_trigger
+BEFORE INSERT OR UPDATE OF bookingID ON Renting
+FOR EACH ROW
+EXECUTE FUNCTION check_renting_booking();
+
+-- Stand-in for ON DELETE SET NULL. A booking whose startDate moves to another month is
+-- deleted and re-inserted by Postgres, so only clear the reference if the id is really gone.
+-- Rows moved out of the default partition by create_stay_partitions are skipped as well.
+CREATE OR REPLACE FUNCTION clear_renting_booking()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF current_setting('stay_partitions.moving', true) IS DISTINCT FROM 'on' AND NOT EXISTS (SELECT 1 FROM Booking WHERE bookingID = OLD.bookingID) THEN
+		UPDATE Renting
+		SET bookingID = NULL
+		WHERE bookingID = OLD.bookingID;
+	END IF;
+	RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clear_renting_booking_trigger
+AFTER DELETE ON Booking
+FOR EACH ROW
+EXECUTE FUNCTION clear_renting_booking();
+
+SELECT create_stay_partitions('2025-01-01', (CURRENT_DATE + INTERVAL '12 months')::date);
+
 /* DATA INSERTIONS */
 
 /* Hotel Chains */
@@ -132,7 +274,9 @@ INSERT INTO HotelChain (chainName, address, numberOfHotels, contactEmail, phoneN
 
 /* Hotels */
 
-INSERT INTO Hotel (address, contactEmail, phoneNumber, numberOfRooms, rating, chainName) VALUES
+INSERT INTO Hotel (address, contactEmail, phoneNumber, numberOfRooms, rating, chainID)
+SELECT v.address, v.contactEmail, v.phoneNumber, v.numberOfRooms, v.rating, HotelChain.chainID
+FROM (VALUES
 ('123 Broadway, NYC', 'nyc1@marriotte.com', '212-111-2222', 5, 5, 'Marriotte International'),
 ('456 5th Ave, NYC', 'nyc2@marriotte.com', '212-333-4444', 5, 4, 'Marriotte International'),
 ('789 Sunset Blvd, LA', 'la@marriotte.com', '310-555-6666', 5, 5, 'Marriotte International'),
@@ -172,11 +316,14 @@ INSERT INTO Hotel (address, contactEmail, phoneNumber, numberOfRooms, rating, ch
 ('200 Robson St, Vancouver', 'vancouver@interconti.com', '604-555-6666', 5, 4, 'InterConti Resorts'),
 ('300 Robson St, Vancouver', 'vancouver2@interconti.com', '604-777-8888', 5, 3, 'InterConti Resorts'),
 ('1 Queen St, Brisbane', 'brisbane@interconti.com', '+61-7-9999-0000', 5, 4, 'InterConti Resorts'),
-('50 Kurr a Beach, Gold Coast', 'goldcoast@interconti.com', '+61-7-1111-2222', 5, 5, 'InterConti Resorts');
+('50 Kurr a Beach, Gold Coast', 'goldcoast@interconti.com', '+61-7-1111-2222', 5, 5, 'InterConti Resorts')) AS v (address, contactEmail, phoneNumber, numberOfRooms, rating, chainName)
+JOIN HotelChain ON HotelChain.chainName = v.chainName;
 
 /* Employees */
 
-INSERT INTO Employee (SSN, fullName, address, jobPosition, hotelID) VALUES
+INSERT INTO Employee (SSN, fullName, address, jobPosition, hotelID)
+SELECT v.SSN::TEXT, v.fullName, v.address, v.jobPosition, Hotel.hotelID
+FROM (VALUES
 (100000001, 'James Carter', '123 Broadway, NYC', 'Manager', '123 Broadway, NYC'),
 (100000002, 'Emily Johnson', '456 5th Ave, NYC', 'Receptionist', '456 5th Ave, NYC'),
 (100000003, 'Michael Brown', '789 Elm St, NYC', 'Housekeeper', '123 Broadway, NYC'),
@@ -376,11 +523,14 @@ INSERT INTO Employee (SSN, fullName, address, jobPosition, hotelID) VALUES
 (100000197, 'Liam Martin', '100 Surfers Paradise, Gold Coast', 'Receptionist', '50 Kurr a Beach, Gold Coast'),
 (100000198, 'Mia Thompson', '200 Broadbeach, Gold Coast', 'Housekeeper', '50 Kurr a Beach, Gold Coast'),
 (100000199, 'James Davis', '300 Burleigh Heads, Gold Coast', 'Concierge', '50 Kurr a Beach, Gold Coast'),
-(100000200, 'Sophia Wilson', '400 Coolangatta, Gold Coast', 'Chef', '50 Kurr a Beach, Gold Coast');
+(100000200, 'Sophia Wilson', '400 Coolangatta, Gold Coast', 'Chef', '50 Kurr a Beach, Gold Coast')) AS v (SSN, fullName, address, jobPosition, hotelAddress)
+JOIN Hotel ON Hotel.address = v.hotelAddress;
 
 /* Rooms */
 
-INSERT INTO Room (roomNumber, price, amenities, problems, extendable, viewType, capacity, hotelAddress) VALUES
+INSERT INTO Room (roomNumber, price, amenities, problems, extendable, viewType, capacity, hotelID)
+SELECT v.roomNumber, v.price, v.amenities, v.problems, v.extendable, v.viewType, v.capacity, Hotel.hotelID
+FROM (VALUES
 (101, 100.00, 'TV, Wi-Fi', 'None', TRUE, 'mountain view', 1, '123 Broadway, NYC'),
 (102, 180.00, 'TV, Wi-Fi, Mini-bar', 'None', TRUE, 'sea view', 2, '123 Broadway, NYC'),
 (103, 200.00, 'TV, Wi-Fi, Safe', 'Minor AC issue', FALSE, 'mountain view', 3, '123 Broadway, NYC'),
@@ -580,7 +730,8 @@ INSERT INTO Room (roomNumber, price, amenities, problems, extendable, viewType,
 (4002, 240.00, 'TV, Wi-Fi, Mini-bar', 'None', TRUE, 'sea view', 2, '50 Kurr a Beach, Gold Coast'),  
 (4003, 280.00, 'TV, Wi-Fi, Safe', 'None', FALSE, 'sea view', 3, '50 Kurr a Beach, Gold Coast'),  
 (4004, 370.00, 'TV, Wi-Fi, Balcony', 'None', TRUE, 'sea view', 4, '50 Kurr a Beach, Gold Coast'),  
-(4005, 420.00, 'TV, Wi-Fi, Jacuzzi', 'None', FALSE, 'sea view', 5, '50 Kurr a Beach, Gold Coast');  
+(4005, 420.00, 'TV, Wi-Fi, Jacuzzi', 'None', FALSE, 'sea view', 5, '50 Kurr a Beach, Gold Coast')) AS v (roomNumber, price, amenities, problems, extendable, viewType, capacity, hotelAddress)
+JOIN Hotel ON Hotel.address = v.hotelAddress;  
 
 /* Customers */
 INSERT INTO Customer (customerID, fullName, address) VALUES
@@ -0,0 +1,251 @@
+-- ONLINE MIGRATION: address / chainName keys -> integer surrogate keys
+-- Brings a database created by an older initialization.sql in line with the current one.
+-- Run with psql, NOT inside a transaction block (CREATE INDEX CONCURRENTLY and COMMIT in DO blocks need that):
+--     psql -d hotel_management -f SQL/migrate_surrogate_keys.sql
+-- Steps 1-4 only take short locks, so the old backend keeps serving while they run.
+-- Step 5 is a single short transaction; deploy the new backend right after it commits.
+
+\set ON_ERROR_STOP on
+
+/* STEP 1: EXPAND - new nullable columns (no table rewrite) */
+
+ALTER TABLE HotelChain ADD COLUMN IF NOT EXISTS chainID INT;
+CREATE SEQUENCE IF NOT EXISTS hotelchain_chainid_seq OWNED BY HotelChain.chainID;
+ALTER TABLE HotelChain ALTER COLUMN chainID SET DEFAULT nextval('hotelchain_chainid_seq');
+
+ALTER TABLE Hotel ADD COLUMN IF NOT EXISTS hotelID INT;
+CREATE SEQUENCE IF NOT EXISTS hotel_hotelid_seq OWNED BY Hotel.hotelID;
+ALTER TABLE Hotel ALTER COLUMN hotelID SET DEFAULT nextval('hotel_hotelid_seq');
+ALTER TABLE Hotel ADD COLUMN IF NOT EXISTS chainID INT;
+
+ALTER TABLE Room ADD COLUMN IF NOT EXISTS hotelID INT;
+
+-- Employee.hotelID still holds the address; the integer goes in hotelKey and is renamed in step 5
+ALTER TABLE Employee ADD COLUMN IF NOT EXISTS hotelKey INT;
+
+/* STEP 2: keep the new columns in sync with writes made by the old backend */
+
+CREATE OR REPLACE FUNCTION sync_hotel_chain_key()
+RETURNS TRIGGER AS $$
+BEGIN
+	NEW.chainID := (SELECT chainID FROM HotelChain WHERE chainName = NEW.chainName);
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER sync_hotel_chain_key_trigger
+BEFORE INSERT OR UPDATE OF chainName ON Hotel
+FOR EACH ROW
+EXECUTE FUNCTION sync_hotel_chain_key();
+
+CREATE OR REPLACE FUNCTION sync_room_hotel_key()
+RETURNS TRIGGER AS $$
+BEGIN
+	NEW.hotelID := (SELECT hotelID FROM Hotel WHERE address = NEW.hotelAddress);
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER sync_room_hotel_key_trigger
+BEFORE INSERT OR UPDATE OF hotelAddress ON Room
+FOR EACH ROW
+EXECUTE FUNCTION sync_room_hotel_key();
+
+CREATE OR REPLACE FUNCTION sync_employee_hotel_key()
+RETURNS TRIGGER AS $$
+BEGIN
+	NEW.hotelKey := (SELECT hotelID FROM Hotel WHERE address = NEW.hotelID);
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER sync_employee_hotel_key_trigger
+BEFORE INSERT OR UPDATE OF hotelID ON Employee
+FOR EACH ROW
+EXECUTE FUNCTION sync_employee_hotel_key();
+
+/* STEP 3: BACKFILL - in batches, committing between them so row locks stay short */
+-- Each batch only picks rows that have a matching Hotel, so a batch of orphans cannot end
+-- the loop early; orphans are left NULL and make step 4's VALIDATE fail, as they should.
+
+UPDATE HotelChain SET chainID = nextval('hotelchain_chainid_seq') WHERE chainID IS NULL;
+UPDATE Hotel SET hotelID = nextval('hotel_hotelid_seq') WHERE hotelID IS NULL;
+
+UPDATE Hotel
+SET chainID = HotelChain.chainID
+FROM HotelChain
+WHERE HotelChain.chainName = Hotel.chainName
+AND Hotel.chainID IS NULL;
+
+DO $$
+DECLARE
+	updated INT;
+BEGIN
+	LOOP
+		UPDATE Room
+		SET hotelID = Hotel.hotelID
+		FROM Hotel
+		WHERE Hotel.address = Room.hotelAddress
+		AND Room.roomNumber IN (
+			SELECT Room.roomNumber FROM Room
+			JOIN Hotel ON Hotel.address = Room.hotelAddress
+			WHERE Room.hotelID IS NULL
+			LIMIT 5000
+		);
+		GET DIAGNOSTICS updated = ROW_COUNT;
+		EXIT WHEN updated = 0;
+		COMMIT;
+	END LOOP;
+END;
+$$;
+
+DO $$
+DECLARE
+	updated INT;
+BEGIN
+	LOOP
+		UPDATE Employee
+		SET hotelKey = Hotel.hotelID
+		FROM Hotel
+		WHERE Hotel.address = Employee.hotelID
+		AND Employee.SSN IN (
+			SELECT Employee.SSN FROM Employee
+			JOIN Hotel ON Hotel.address = Employee.hotelID
+			WHERE Employee.hotelKey IS NULL
+			LIMIT 5000
+		);
+		GET DIAGNOSTICS updated = ROW_COUNT;
+		EXIT WHEN updated = 0;
+		COMMIT;
+	END LOOP;
+END;
+$$;
+
+/* STEP 4: indexes and NOT NULL, built without blocking writes */
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS hotelchain_chainid_key ON HotelChain (chainID);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS hotel_hotelid_key ON Hotel (hotelID);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS room_roomnumber_hotelid_key ON Room (roomNumber, hotelID);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hotel_chain ON Hotel (chainID);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_room_hotel ON Room (hotelID);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_employee_hotel ON Employee (hotelKey);
+
+-- A validated CHECK lets SET NOT NULL skip its full-table scan under an exclusive lock
+ALTER TABLE HotelChain ADD CONSTRAINT hotelchain_chainid_not_null CHECK (chainID IS NOT NULL) NOT VALID;
+ALTER TABLE Hotel ADD CONSTRAINT hotel_hotelid_not_null CHECK (hotelID IS NOT NULL) NOT VALID;
+ALTER TABLE Hotel ADD CONSTRAINT hotel_chainid_not_null CHECK (chainID IS NOT NULL) NOT VALID;
+ALTER TABLE Room ADD CONSTRAINT room_hotelid_not_null CHECK (hotelID IS NOT NULL) NOT VALID;
+ALTER TABLE Employee ADD CONSTRAINT employee_hotelkey_not_null CHECK (hotelKey IS NOT NULL) NOT VALID;
+
+ALTER TABLE HotelChain VALIDATE CONSTRAINT hotelchain_chainid_not_null;
+ALTER TABLE Hotel VALIDATE CONSTRAINT hotel_hotelid_not_null;
+ALTER TABLE Hotel VALIDATE CONSTRAINT hotel_chainid_not_null;
+ALTER TABLE Room VALIDATE CONSTRAINT room_hotelid_not_null;
+ALTER TABLE Employee VALIDATE CONSTRAINT employee_hotelkey_not_null;
+
+/* STEP 5: CONTRACT - switch keys and drop the string columns in one short transaction */
+
+BEGIN;
+
+DROP VIEW IF EXISTS AvailableRoomsPerArea;
+DROP VIEW IF EXISTS HotelRoomCapacity;
+
+DROP TRIGGER sync_hotel_chain_key_trigger ON Hotel;
+DROP TRIGGER sync_room_hotel_key_trigger ON Room;
+DROP TRIGGER sync_employee_hotel_key_trigger ON Employee;
+DROP FUNCTION sync_hotel_chain_key();
+DROP FUNCTION sync_room_hotel_key();
+DROP FUNCTION sync_employee_hotel_key();
+
+ALTER TABLE Hotel DROP CONSTRAINT IF EXISTS hotel_chainname_fkey;
+ALTER TABLE Room DROP CONSTRAINT IF EXISTS room_hoteladdress_fkey;
+ALTER TABLE Employee DROP CONSTRAINT IF EXISTS employee_hotelid_fkey;
+
+ALTER TABLE HotelChain ALTER COLUMN chainID SET NOT NULL;
+ALTER TABLE Hotel ALTER COLUMN hotelID SET NOT NULL;
+ALTER TABLE Hotel ALTER COLUMN chainID SET NOT NULL;
+ALTER TABLE Room ALTER COLUMN hotelID SET NOT NULL;
+ALTER TABLE Employee ALTER COLUMN hotelKey SET NOT NULL;
+ALTER TABLE HotelChain DROP CONSTRAINT hotelchain_chainid_not_null;
+ALTER TABLE Hotel DROP CONSTRAINT hotel_hotelid_not_null;
+ALTER TABLE Hotel DROP CONSTRAINT hotel_chainid_not_null;
+ALTER TABLE Room DROP CONSTRAINT room_hotelid_not_null;
+ALTER TABLE Employee DROP CONSTRAINT employee_hotelkey_not_null;
+
+-- address and chainName keep their own UNIQUE constraints
+ALTER TABLE HotelChain DROP CONSTRAINT hotelchain_pkey;
+ALTER TABLE HotelChain ADD CONSTRAINT hotelchain_pkey PRIMARY KEY USING INDEX hotelchain_chainid_key;
+ALTER TABLE Hotel DROP CONSTRAINT hotel_pkey;
+ALTER TABLE Hotel ADD CONSTRAINT hotel_pkey PRIMARY KEY USING INDEX hotel_hotelid_key;
+ALTER TABLE Room ADD CONSTRAINT room_roomnumber_hotelid_key UNIQUE USING INDEX room_roomnumber_hotelid_key;
+
+-- NOT VALID: existing rows are checked after commit, without holding this transaction's locks
+ALTER TABLE Hotel ADD CONSTRAINT hotel_chainid_fkey
+	FOREIGN KEY (chainID) REFERENCES HotelChain (chainID) ON DELETE CASCADE NOT VALID;
+ALTER TABLE Room ADD CONSTRAINT room_hotelid_fkey
+	FOREIGN KEY (hotelID) REFERENCES Hotel (hotelID) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE Hotel DROP COLUMN chainName;
+ALTER TABLE Room DROP COLUMN hotelAddress;
+ALTER TABLE Employee DROP COLUMN hotelID;
+ALTER TABLE Employee RENAME COLUMN hotelKey TO hotelID;
+ALTER TABLE Employee ADD CONSTRAINT employee_hotelid_fkey
+	FOREIGN KEY (hotelID) REFERENCES Hotel (hotelID) ON DELETE SET NULL NOT VALID;
+
+CREATE OR REPLACE FUNCTION set_hotel_manager()
+RETURNS TRIGGER AS $$
+BEGIN
+	IF NEW.jobPosition = 'Manager' THEN
+		UPDATE Hotel
+		SET managerID = NEW.SSN
+		WHERE hotelID = NEW.hotelID;
+	END IF;
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION calculate_hotel_count()
+RETURNS TRIGGER AS $$
+BEGIN
+	UPDATE HotelChain
+	SET numberOfHotels = (
+		SELECT COUNT(*)
+		FROM Hotel currentHotel
+		WHERE currentHotel.chainID = NEW.chainID
+	)
+	WHERE chainID = NEW.chainID;
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE VIEW AvailableRoomsPerArea AS
+SELECT
+    SUBSTRING(Hotel.address FROM '^([^,]+)') AS area,
+    COUNT(Room.roomNumber) AS available_rooms
+FROM Hotel
+JOIN Room ON Hotel.hotelID = Room.hotelID
+WHERE Room.roomNumber NOT IN (
+    SELECT roomNumber
+    FROM Booking
+    WHERE CURRENT_DATE BETWEEN startDate AND endDate
+    AND startDate >= CURRENT_DATE - INTERVAL '365 days'
+)
+GROUP BY SUBSTRING(Hotel.address FROM '^([^,]+)');
+
+CREATE OR REPLACE VIEW HotelRoomCapacity AS
+SELECT
+    Hotel.address AS hotel_address,
+    HotelChain.chainName AS hotel_chain,
+    COUNT(Room.roomNumber) AS total_rooms,
+    SUM(Room.capacity) AS total_capacity,
+    AVG(Room.capacity)::numeric(10,2) AS average_room_capacity
+FROM Hotel
+JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+JOIN Room ON Hotel.hotelID = Room.hotelID
+GROUP BY Hotel.hotelID, Hotel.address, HotelChain.chainName;
+
+COMMIT;
+
+ALTER TABLE Hotel VALIDATE CONSTRAINT hotel_chainid_fkey;
+ALTER TABLE Room VALIDATE CONSTRAINT room_hotelid_fkey;
+ALTER TABLE Employee VALIDATE CONSTRAINT employee_hotelid_fkey;
@@ -1,12 +1,13 @@
 -- Query 1: List all managers, their hotels, and contact information
-SELECT Employee.fullName AS managerName, hotelID, contactEmail, phoneNumber
+SELECT Employee.fullName AS managerName, Hotel.address AS hotelAddress, contactEmail, phoneNumber
 FROM Employee
 JOIN Hotel on Employee.SSN = Hotel.managerID
 WHERE Employee.jobPosition = 'Manager';
 
 -- Query 2: Rooms that are currently not booked (Nested Query)
-SELECT roomNumber, hotelAddress
+SELECT roomNumber, Hotel.address AS hotelAddress
 FROM Room
+JOIN Hotel ON Hotel.hotelID = Room.hotelID
 WHERE roomNumber NOT IN (
     SELECT roomNumber
     FROM Booking
@@ -16,9 +17,9 @@ WHERE roomNumber NOT IN (
 -- Query 3: Average room price per hotel chain (Aggregation Query)
 SELECT HotelChain.chainName, AVG(price) AS averageRoomPrice
 FROM HotelChain
-JOIN Hotel ON HotelChain.chainName = Hotel.chainName
-JOIN ROOM ON Hotel.address = Room.hotelAddress
-GROUP BY HotelChain.chainName;
+JOIN Hotel ON HotelChain.chainID = Hotel.chainID
+JOIN Room ON Hotel.hotelID = Room.hotelID
+GROUP BY HotelChain.chainID, HotelChain.chainName;
 
 -- Query 4: Bookings made by customer with customerID TC001
 SELECT *
@@ -45,11 +46,13 @@ SELECT
     SUBSTRING(Hotel.address FROM '^([^,]+)') AS area,
     COUNT(Room.roomNumber) AS available_rooms
 FROM Hotel
-JOIN Room ON Hotel.address = Room.hotelAddress
+JOIN Room ON Hotel.hotelID = Room.hotelID
 WHERE Room.roomNumber NOT IN (
     SELECT roomNumber 
     FROM Booking 
     WHERE CURRENT_DATE BETWEEN startDate AND endDate
+    -- Stays are at most 365 days long; bounding startDate lets Postgres prune old partitions
+    AND startDate >= CURRENT_DATE - INTERVAL '365 days'
 )
 GROUP BY SUBSTRING(Hotel.address FROM '^([^,]+)');
 
@@ -57,10 +60,11 @@ GROUP BY SUBSTRING(Hotel.address FROM '^([^,]+)');
 CREATE OR REPLACE VIEW HotelRoomCapacity AS
 SELECT 
     Hotel.address AS hotel_address,
-    Hotel.chainName AS hotel_chain,
+    HotelChain.chainName AS hotel_chain,
     COUNT(Room.roomNumber) AS total_rooms,
     SUM(Room.capacity) AS total_capacity,
     AVG(Room.capacity) AS average_room_capacity
 FROM Hotel
-JOIN Room ON Hotel.address = Room.hotelAddress
-GROUP BY Hotel.address, Hotel.chainName;
\ No newline at end of file
+JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+JOIN Room ON Hotel.hotelID = Room.hotelID
+GROUP BY Hotel.hotelID, Hotel.address, HotelChain.chainName;
\ No newline at end of file
@@ -0,0 +1,186 @@
+import asyncio
+import math
+import os
+import time
+from typing import Optional
+
+# Admission control: each expensive endpoint class gets a fixed number of concurrent
+# requests and a bounded wait queue with a deadline. Requests that find the queue full,
+# or wait past the deadline, are shed with a fast 503 + Retry-After instead of piling up
+# on Postgres and timing out, which keeps cheap endpoints responsive during bursts.
+
+class AdmissionGate:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    async def acquire(self) -> bool:
+        if self.queued >= self.max_queue and self.slots.locked():
+            self.shed_queue_full += 1
+            return False
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            return False
+        finally:
+            self.queued -= 1
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self.slots.release()
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+def gate_from_env(name: str, max_concurrent: int, max_queue: int, queue_timeout: float) -> AdmissionGate:
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionGate(
+        name,
+        int(os.getenv(f"{prefix}_CONCURRENCY", max_concurrent)),
+        int(os.getenv(f"{prefix}_QUEUE", max_queue)),
+        float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout))
+    )
+
+gates = {
+    "search": gate_from_env("search", 8, 16, 2.0),
+    "analytics": gate_from_env("analytics", 4, 8, 5.0),
+    "writes": gate_from_env("writes", 16, 64, 2.0),
+}
+
+def endpoint_class(method: str, path: str) -> Optional[str]:
+    # Everything else (cheap reads, /admission/ itself) is never queued
+    if path.startswith("/rooms/search"):
+        return "search"
+    if path.startswith("/views/") or path.startswith("/exports/"):
+        return "analytics"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "writes"
+    return None
+
+class AdmissionMiddleware:
+    # Plain ASGI middleware so the slot is held until the whole response, including a
+    # streamed body, has been sent
+    def __init__(self, app, gates: dict = gates):
+        self.app = app
+        self.gates = gates
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        gate = self.gates.get(endpoint_class(scope["method"], scope["path"]))
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        if not await gate.acquire():
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(gate.retry_after()).encode()),
+                ],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": f'{{"detail":"Too many {gate.name} requests, retry later"}}'.encode(),
+            })
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+def load_test(search_requests: int = 300, cheap_requests: int = 200, search_seconds: float = 0.2):
+    # Floods a stand-in search endpoint (a blocking call, like a saturated DB) while
+    # measuring a cheap GET, once without admission control and once with it
+    from fastapi import FastAPI
+
+    demo = FastAPI()
+
+    @demo.post("/rooms/search/")
+    def slow_search():
+        time.sleep(search_seconds)
+        return []
+
+    @demo.get("/customers/")
+    def cheap_read():
+        return []
+
+    async def call(app, method: str, path: str):
+        status = {}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "root_path": "", "query_string": b"", "headers": [],
+            "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000),
+        }
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        return status.get("code"), time.perf_counter() - started
+
+    async def run(app):
+        searches = [asyncio.create_task(call(app, "POST", "/rooms/search/")) for _ in range(search_requests)]
+        await asyncio.sleep(0.05)
+        cheap = []
+        for _ in range(cheap_requests):
+            cheap.append(asyncio.create_task(call(app, "GET", "/customers/")))
+            await asyncio.sleep(0.005)
+        search_results = await asyncio.gather(*searches)
+        cheap_results = await asyncio.gather(*cheap)
+        return search_results, cheap_results
+
+    def percentile(latencies, fraction):
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    demo_gates = {
+        "search": AdmissionGate("search", 8, 16, 1.0),
+        "analytics": AdmissionGate("analytics", 4, 8, 5.0),
+        "writes": AdmissionGate("writes", 16, 64, 2.0),
+    }
+    for label, app in (("without admission control", demo), ("with admission control", AdmissionMiddleware(demo, demo_gates))):
+        search_results, cheap_results = asyncio.run(run(app))
+        cheap_latencies = [latency for _, latency in cheap_results]
+        shed = sum(1 for code, _ in search_results if code == 503)
+        print(
+            f"{label:>26}: cheap GET p50 {percentile(cheap_latencies, 0.5):7.1f} ms"
+            f"  p99 {percentile(cheap_latencies, 0.99):7.1f} ms"
+            f"  | search served {len(search_results) - shed}, shed {shed}"
+        )
+
+# python -m app.admission
+if __name__ == "__main__":
+    load_test()
@@ -0,0 +1,140 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Iterator
+from sqlalchemy import text
+from . import database
+
+# Streaming extracts of bookings and rentings for a startDate range. Rows come from a
+# single query on a server-side cursor (one snapshot, fetched EXPORT_BATCH_ROWS at a
+# time) and are written out batch by batch, so memory stays flat whatever the row count.
+
+EXPORT_BATCH_ROWS = 5000
+
+# (column, type) pairs; the types are only needed to give Parquet files a fixed schema
+EXPORTS = {
+    "bookings": {
+        "columns": [
+            ("bookingid", "int"), ("startdate", "timestamp"), ("enddate", "timestamp"),
+            ("customerid", "str"), ("customername", "str"), ("roomnumber", "int"),
+            ("price", "float"), ("viewtype", "str"), ("capacity", "int"),
+            ("hoteladdress", "str"), ("chainname", "str"),
+        ],
+        "sql": """
+            SELECT Booking.bookingID, Booking.startDate, Booking.endDate,
+                   Booking.customerID, Customer.fullName AS customerName, Booking.roomNumber,
+                   Room.price, Room.viewType, Room.capacity,
+                   Hotel.address AS hotelAddress, HotelChain.chainName
+            FROM Booking
+            JOIN Customer ON Customer.customerID = Booking.customerID
+            JOIN Room ON Room.roomNumber = Booking.roomNumber
+            JOIN Hotel ON Hotel.hotelID = Room.hotelID
+            JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+            WHERE Booking.startDate >= :start_date AND Booking.startDate < :end_date
+            ORDER BY Booking.startDate, Booking.bookingID
+        """,
+    },
+    "rentings": {
+        "columns": [
+            ("rentingid", "int"), ("bookingid", "int"), ("startdate", "timestamp"), ("enddate", "timestamp"),
+            ("paymentinformation", "str"), ("employeeid", "str"),
+            ("customerid", "str"), ("customername", "str"), ("roomnumber", "int"),
+            ("price", "float"), ("viewtype", "str"), ("capacity", "int"),
+            ("hoteladdress", "str"), ("chainname", "str"),
+        ],
+        "sql": """
+            SELECT Renting.rentingID, Renting.bookingID, Renting.startDate, Renting.endDate,
+                   Renting.paymentInformation, Renting.employeeID,
+                   Renting.customerID, Customer.fullName AS customerName, Renting.roomNumber,
+                   Room.price, Room.viewType, Room.capacity,
+                   Hotel.address AS hotelAddress, HotelChain.chainName
+            FROM Renting
+            JOIN Customer ON Customer.customerID = Renting.customerID
+            JOIN Room ON Room.roomNumber = Renting.roomNumber
+            JOIN Hotel ON Hotel.hotelID = Room.hotelID
+            JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+            WHERE Renting.startDate >= :start_date AND Renting.startDate < :end_date
+            ORDER BY Renting.startDate, Renting.rentingID
+        """,
+    },
+}
+
+def stream_rows(kind: str, start_date: datetime, end_date: datetime) -> Iterator[list]:
+    # Yields lists of at most EXPORT_BATCH_ROWS rows; the connection is held until the last one
+    with database.engine.connect() as connection:
+        connection = connection.execution_options(
+            isolation_level="REPEATABLE READ",
+            stream_results=True,
+            yield_per=EXPORT_BATCH_ROWS
+        )
+        result = connection.execute(
+            text(EXPORTS[kind]["sql"]),
+            {"start_date": start_date, "end_date": end_date}
+        )
+        for batch in result.partitions():
+            yield batch
+
+def stream_csv(kind: str, start_date: datetime, end_date: datetime, compress: bool) -> Iterator[bytes]:
+    # wbits=31 makes zlib write a gzip container, so the output is a regular .csv.gz
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+
+    writer.writerow([name for name, _ in EXPORTS[kind]["columns"]])
+    yield flush()
+    for batch in stream_rows(kind, start_date, end_date):
+        writer.writerows(batch)
+        chunk = flush()
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file object that hands back whatever was written since the last drain
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_parquet(kind: str, start_date: datetime, end_date: datetime) -> Iterator[bytes]:
+    # One Parquet row group per fetched batch, compressed with snappy
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "timestamp": pa.timestamp("us", tz="UTC")}
+    columns = EXPORTS[kind]["columns"]
+    schema = pa.schema([(name, types[column_type]) for name, column_type in columns])
+
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for batch in stream_rows(kind, start_date, end_date):
+            arrays = [
+                pa.array([row[index] for row in batch], type=schema.field(index).type)
+                for index in range(len(columns))
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
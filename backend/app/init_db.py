@@ -59,11 +59,12 @@ def init_database():
             SUBSTRING(Hotel.address FROM '^([^,]+)') AS area,
             COUNT(Room.roomNumber) AS available_rooms
         FROM Hotel
-        JOIN Room ON Hotel.address = Room.hotelAddress
+        JOIN Room ON Hotel.hotelID = Room.hotelID
         WHERE Room.roomNumber NOT IN (
             SELECT roomNumber 
             FROM Booking 
             WHERE CURRENT_DATE BETWEEN startDate AND endDate
+            AND startDate >= CURRENT_DATE - INTERVAL '365 days'
         )
         GROUP BY SUBSTRING(Hotel.address FROM '^([^,]+)');
         """)
@@ -73,13 +74,14 @@ def init_database():
         CREATE OR REPLACE VIEW HotelRoomCapacity AS
         SELECT 
             Hotel.address AS hotel_address,
-            Hotel.chainName AS hotel_chain,
+            HotelChain.chainName AS hotel_chain,
             COUNT(Room.roomNumber) AS total_rooms,
             SUM(Room.capacity) AS total_capacity,
             AVG(Room.capacity)::numeric(10,2) AS average_room_capacity
         FROM Hotel
-        JOIN Room ON Hotel.address = Room.hotelAddress
-        GROUP BY Hotel.address, Hotel.chainName;
+        JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+        JOIN Room ON Hotel.hotelID = Room.hotelID
+        GROUP BY Hotel.hotelID, Hotel.address, HotelChain.chainName;
         """)
 
         print("Database and views initialized successfully!")
@@ -0,0 +1,399 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+# In-process columnar snapshot of the room inventory. Room and hotel attributes change
+# rarely, so search_rooms evaluates its attribute filters here as vectorized masks and
+# only goes to Postgres for the availability check and the final row fetch.
+#
+# Rooms are rows in parallel NumPy arrays; hotels are rows in a second, smaller set of
+# arrays that rooms point into, and view types are dictionary-encoded. Hotel filters
+# (area, chain, rating) are evaluated per hotel and gathered onto the rooms, so nothing
+# is stored per chain, rating or view type: the arrays take 21 bytes per room. The write
+# endpoints keep the snapshot current; each process holds its own copy, loaded at startup
+# and reloaded every INVENTORY_RELOAD_SECONDS to pick up changes made by other workers or
+# directly in SQL.
+
+INITIAL_CAPACITY = 1024
+INVENTORY_RELOAD_SECONDS = float(os.getenv("INVENTORY_RELOAD_SECONDS", 300))
+RELOAD_ATTEMPTS = 3
+
+ROOM_COLUMNS = {
+    "roomnumber": np.int32,
+    "price": np.float64,
+    "capacity": np.int16,
+    "viewtype": np.int16,
+    "hotel": np.int32,
+    "alive": bool,
+}
+HOTEL_COLUMNS = {
+    "hotel_chain": np.int32,
+    "hotel_rating": np.int16,
+}
+
+class InventorySnapshot:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        # Bumped by every incremental update, so a reload can tell it raced with one
+        self.version = 0
+        self.clear()
+
+    def clear(self):
+        self.size = 0
+        self.row_of_room = {}
+        for name, dtype in ROOM_COLUMNS.items():
+            setattr(self, name, np.zeros(INITIAL_CAPACITY, dtype=dtype))
+
+        self.viewtype_code = {}
+
+        self.hotel_count = 0
+        self.row_of_hotel = {}
+        self.hotel_area = []
+        for name, dtype in HOTEL_COLUMNS.items():
+            setattr(self, name, np.zeros(INITIAL_CAPACITY, dtype=dtype))
+
+        self.chain_id_of_name = {}
+
+    # Loading
+
+    def load(self, db: Session):
+        # One REPEATABLE READ snapshot for the three reads, so a hotel and its rooms created
+        # in between cannot leave a room pointing at a hotel that was not read
+        if not db.in_transaction():
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        chains = db.query(models.HotelChain.chainid, models.HotelChain.chainname).all()
+        hotels = db.query(models.Hotel.hotelid, models.Hotel.address, models.Hotel.chainid, models.Hotel.rating).all()
+        rooms = db.query(
+            models.Room.roomnumber, models.Room.price, models.Room.capacity, models.Room.viewtype, models.Room.hotelid
+        ).all()
+        self.build(chains, hotels, rooms)
+
+    def reload(self, db: Session, attempts: int = RELOAD_ATTEMPTS) -> bool:
+        # Built aside and swapped in, so searches only wait for the swap. An incremental
+        # update applied while the fresh copy was being read may be missing from it, so the
+        # swap only happens when none came in; otherwise the read is retried, and after the
+        # last attempt the current, incrementally maintained snapshot is kept.
+        for _ in range(attempts):
+            with self.lock:
+                version = self.version
+            db.rollback()
+            fresh = InventorySnapshot()
+            fresh.load(db)
+            with self.lock:
+                if self.version == version:
+                    self.__dict__.update({
+                        name: value for name, value in vars(fresh).items() if name not in ("lock", "version")
+                    })
+                    return True
+        return False
+
+    def start_reloading(self, session_factory, interval: float = INVENTORY_RELOAD_SECONDS):
+        def run():
+            while True:
+                time.sleep(interval)
+                db = session_factory()
+                try:
+                    if not self.reload(db):
+                        print("Inventory reload skipped: updates kept arriving during the reload")
+                except Exception as error:
+                    print(f"Inventory reload failed: {error}")
+                finally:
+                    db.close()
+
+        threading.Thread(target=run, name="inventory-reload", daemon=True).start()
+
+    def build(self, chains, hotels, rooms):
+        # chains: (chainid, chainname), hotels: (hotelid, address, chainid, rating),
+        # rooms: (roomnumber, price, capacity, viewtype, hotelid)
+        with self.lock:
+            self.clear()
+            for chain_id, chain_name in chains:
+                self.chain_id_of_name[chain_name] = chain_id
+            for hotel_id, address, chain_id, rating in hotels:
+                self._set_hotel(hotel_id, address, chain_id, rating)
+
+            self._grow(len(rooms))
+            n = len(rooms)
+            if n:
+                roomnumbers, prices, capacities, viewtypes, hotel_ids = zip(*rooms)
+                self.roomnumber[:n] = roomnumbers
+                self.price[:n] = [np.nan if price is None else price for price in prices]
+                self.capacity[:n] = [capacity or 0 for capacity in capacities]
+                self.viewtype[:n] = [self._viewtype_code(viewtype) for viewtype in viewtypes]
+                self.hotel[:n] = [self.row_of_hotel[hotel_id] for hotel_id in hotel_ids]
+                self.alive[:n] = True
+                self.row_of_room = {roomnumber: row for row, roomnumber in enumerate(roomnumbers)}
+            self.size = n
+            self.loaded = True
+
+    # Incremental updates from the write endpoints
+
+    def upsert_chain(self, chain: models.HotelChain):
+        with self.lock:
+            self.version += 1
+            self.chain_id_of_name[chain.chainname] = chain.chainid
+
+    def upsert_hotel(self, hotel: models.Hotel):
+        with self.lock:
+            self.version += 1
+            self._set_hotel(hotel.hotelid, hotel.address, hotel.chainid, hotel.rating)
+            if hotel.chainname is not None:
+                self.chain_id_of_name[hotel.chainname] = hotel.chainid
+
+    def delete_hotel(self, hotel_id: int):
+        with self.lock:
+            self.version += 1
+            code = self.row_of_hotel.get(hotel_id)
+            if code is None:
+                return
+            # Rooms go with their hotel (ON DELETE CASCADE)
+            self.alive[:self.size][self.hotel[:self.size] == code] = False
+
+    def upsert_room(self, room: models.Room):
+        with self.lock:
+            self.version += 1
+            if room.hotelid not in self.row_of_hotel:
+                self.upsert_hotel(room.hotel)
+            row = self.row_of_room.get(room.roomnumber)
+            if row is None:
+                self._grow(self.size + 1)
+                row = self.size
+                self.size += 1
+                self.row_of_room[room.roomnumber] = row
+
+            self.roomnumber[row] = room.roomnumber
+            self.price[row] = np.nan if room.price is None else room.price
+            self.capacity[row] = room.capacity or 0
+            self.viewtype[row] = self._viewtype_code(room.viewtype)
+            self.hotel[row] = self.row_of_hotel[room.hotelid]
+            self.alive[row] = True
+
+    def delete_room(self, roomnumber: int):
+        with self.lock:
+            self.version += 1
+            row = self.row_of_room.get(roomnumber)
+            if row is not None:
+                self.alive[row] = False
+
+    # Filtering
+
+    def room_count(self) -> int:
+        with self.lock:
+            return int(np.count_nonzero(self.alive[:self.size]))
+
+    def matching_rooms(self, search_params: schemas.RoomSearch) -> np.ndarray:
+        # Same attribute filters as search_rooms, as one boolean mask over all rooms
+        with self.lock:
+            n = self.size
+            mask = self.alive[:n].copy()
+
+            if search_params.capacity:
+                mask &= self.capacity[:n] >= search_params.capacity
+
+            if search_params.min_price is not None:
+                mask &= self.price[:n] >= search_params.min_price
+
+            if search_params.max_price is not None:
+                mask &= self.price[:n] <= search_params.max_price
+
+            if search_params.view_type:
+                code = self.viewtype_code.get(search_params.view_type)
+                mask &= self.viewtype[:n] == (-1 if code is None else code)
+
+            # Hotel filters are combined per hotel first, then gathered onto the rooms once
+            hotel_match = self._matching_hotels(search_params)
+            if hotel_match is not None:
+                mask &= hotel_match[self.hotel[:n]]
+
+            return self.roomnumber[:n][mask]
+
+    def _matching_hotels(self, search_params: schemas.RoomSearch):
+        h = self.hotel_count
+        hotel_match = None
+
+        if search_params.area:
+            area = search_params.area.lower()
+            hotel_match = np.fromiter((area in address for address in self.hotel_area), dtype=bool, count=h)
+
+        if search_params.hotel_chain:
+            chain_id = self.chain_id_of_name.get(search_params.hotel_chain)
+            chain_match = self.hotel_chain[:h] == chain_id if chain_id is not None else np.zeros(h, dtype=bool)
+            hotel_match = chain_match if hotel_match is None else hotel_match & chain_match
+
+        if search_params.hotel_rating:
+            rating_match = self.hotel_rating[:h] == search_params.hotel_rating
+            hotel_match = rating_match if hotel_match is None else hotel_match & rating_match
+
+        return hotel_match
+
+    # Internals
+
+    def _grow(self, needed: int):
+        allocated = len(self.alive)
+        if needed <= allocated:
+            return
+        new_size = max(needed, allocated * 2)
+        for name in ROOM_COLUMNS:
+            setattr(self, name, self._resized(getattr(self, name), new_size))
+
+    def _resized(self, array: np.ndarray, new_size: int) -> np.ndarray:
+        resized = np.zeros(new_size, dtype=array.dtype)
+        resized[:len(array)] = array
+        return resized
+
+    def _viewtype_code(self, viewtype) -> int:
+        if viewtype not in self.viewtype_code:
+            self.viewtype_code[viewtype] = len(self.viewtype_code)
+        return self.viewtype_code[viewtype]
+
+    def _set_hotel(self, hotel_id: int, address: str, chain_id: int, rating) -> int:
+        code = self.row_of_hotel.get(hotel_id)
+        if code is None:
+            code = self.hotel_count
+            if code == len(self.hotel_chain):
+                for name in HOTEL_COLUMNS:
+                    setattr(self, name, self._resized(getattr(self, name), 2 * code))
+            self.row_of_hotel[hotel_id] = code
+            self.hotel_area.append(address.lower())
+            self.hotel_count += 1
+        else:
+            self.hotel_area[code] = address.lower()
+        self.hotel_chain[code] = chain_id or 0
+        self.hotel_rating[code] = rating or 0
+        return code
+
+store = InventorySnapshot()
+
+BENCHMARK_SEARCHES = {
+    "capacity + price": schemas.RoomSearch(capacity=3, min_price=100, max_price=250),
+    "chain + rating + view": schemas.RoomSearch(hotel_chain="Chain 7", hotel_rating=2, view_type="sea view"),
+    "area + capacity": schemas.RoomSearch(area="City 42", capacity=2),
+    "everything": schemas.RoomSearch(
+        capacity=2, area="City 4", hotel_chain="Chain 12", hotel_rating=2,
+        min_price=80, max_price=400, view_type="city view"
+    ),
+}
+
+def benchmark(rooms: int = 1_000_000, hotels: int = 20_000, repeat: int = 20):
+    # Synthetic inventory; compares the vectorized masks against filtering the same rows in Python
+    rng = np.random.default_rng(0)
+    chains = [(chain_id, f"Chain {chain_id}") for chain_id in range(1, 51)]
+    hotel_rows = [
+        (hotel_id, f"{hotel_id} Some Street, City {hotel_id % 500}", 1 + hotel_id % 50, 1 + hotel_id % 5)
+        for hotel_id in range(1, hotels + 1)
+    ]
+    viewtypes = ["sea view", "mountain view", "city view", "garden view"]
+    room_rows = list(zip(
+        range(1, rooms + 1),
+        rng.uniform(50, 500, rooms).tolist(),
+        rng.integers(1, 7, rooms).tolist(),
+        [viewtypes[i] for i in rng.integers(0, len(viewtypes), rooms)],
+        rng.integers(1, hotels + 1, rooms).tolist()
+    ))
+
+    snapshot = InventorySnapshot()
+    started = time.perf_counter()
+    snapshot.build(chains, hotel_rows, room_rows)
+    print(f"Built snapshot of {rooms:,} rooms in {time.perf_counter() - started:.2f}s")
+
+    hotel_by_id = {row[0]: row for row in hotel_rows}
+    chain_by_name = {name: chain_id for chain_id, name in chains}
+
+    def python_filter(search_params):
+        matched = []
+        for roomnumber, price, capacity, viewtype, hotel_id in room_rows:
+            _, address, chain_id, rating = hotel_by_id[hotel_id]
+            if search_params.capacity and capacity < search_params.capacity:
+                continue
+            if search_params.area and search_params.area.lower() not in address.lower():
+                continue
+            if search_params.hotel_chain and chain_id != chain_by_name.get(search_params.hotel_chain):
+                continue
+            if search_params.hotel_rating and rating != search_params.hotel_rating:
+                continue
+            if search_params.min_price is not None and price < search_params.min_price:
+                continue
+            if search_params.max_price is not None and price > search_params.max_price:
+                continue
+            if search_params.view_type and viewtype != search_params.view_type:
+                continue
+            matched.append(roomnumber)
+        return matched
+
+    for name, search_params in BENCHMARK_SEARCHES.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            matched = snapshot.matching_rooms(search_params)
+        vectorized = (time.perf_counter() - started) / repeat
+        started = time.perf_counter()
+        expected = python_filter(search_params)
+        row_by_row = time.perf_counter() - started
+        assert matched.tolist() == expected
+        print(f"{name:>24}: {len(matched):>7,} rooms  vectorized {vectorized * 1000:7.2f} ms  row-by-row {row_by_row * 1000:8.1f} ms")
+
+def benchmark_sql(db: Session, rooms: int = 1_000_000, hotels: int = 20_000, repeat: int = 3):
+    # End-to-end search_rooms against Postgres: the inventory path (masks + fetch by
+    # roomnumber = ANY) versus the SQL join it replaces. The synthetic data goes into temp
+    # tables that shadow room/hotel/hotelchain for this transaction only.
+    from . import main
+
+    for table in ("hotelchain", "hotel", "room"):
+        db.execute(text(f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING ALL) ON COMMIT DROP"))
+    db.execute(text("INSERT INTO hotelchain (chainid, chainname) SELECT n, 'Chain ' || n FROM generate_series(1, 50) n"))
+    db.execute(
+        text('''
+            INSERT INTO hotel (hotelid, address, rating, chainid)
+            SELECT n, n || ' Some Street, City ' || (n % 500), 1 + n % 5, 1 + n % 50
+            FROM generate_series(1, :hotels) n
+        '''),
+        {"hotels": hotels}
+    )
+    db.execute(text("SELECT setseed(0)"))
+    db.execute(
+        text('''
+            INSERT INTO room (roomnumber, price, capacity, viewtype, hotelid)
+            SELECT n, 50 + random() * 450, 1 + floor(random() * 6)::int,
+                   (ARRAY['sea view', 'mountain view', 'city view', 'garden view'])[1 + floor(random() * 4)::int],
+                   1 + floor(random() * :hotels)::int
+            FROM generate_series(1, :rooms) n
+        '''),
+        {"hotels": hotels, "rooms": rooms}
+    )
+    db.execute(text("ANALYZE hotelchain, hotel, room"))
+
+    snapshot = InventorySnapshot()
+    snapshot.load(db)
+    # main.inventory rather than this module's globals, which differ under python -m
+    original = main.inventory.store
+    try:
+        for name, search_params in BENCHMARK_SEARCHES.items():
+            timings = {}
+            for label, candidate in (("inventory", snapshot), ("sql", InventorySnapshot())):
+                main.inventory.store = candidate
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    found = main.search_rooms(search_params, db)
+                timings[label] = (time.perf_counter() - started) / repeat
+                db.expunge_all()
+            print(f"{name:>24}: {len(found):>7,} rooms  inventory {timings['inventory'] * 1000:8.1f} ms  sql join {timings['sql'] * 1000:8.1f} ms")
+    finally:
+        main.inventory.store = original
+        db.rollback()
+
+# python -m app.inventory [--sql]  (--sql also runs search_rooms against the configured Postgres)
+if __name__ == "__main__":
+    benchmark()
+    if "--sql" in sys.argv:
+        from .database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            benchmark_sql(db)
+        finally:
+            db.close()
@@ -1,14 +1,23 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, not_, func, text
+from sqlalchemy.orm import Session, joinedload, selectinload, contains_eager
+from sqlalchemy import and_, or_, not_, func, text, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from typing import List, Optional
-from datetime import datetime
-from . import models, schemas, database
+from datetime import datetime, timedelta
+from . import models, schemas, database, partitions, search, inventory, exports, admission, projection, compression
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 app = FastAPI()
 
+# Concurrency limits for search, analytics and write endpoints (added before CORS so
+# that shed 503 responses still carry CORS headers)
+app.add_middleware(admission.AdmissionMiddleware)
+
+# gzip/brotli for JSON responses above a size threshold
+app.add_middleware(compression.CompressionMiddleware)
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +27,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Make sure the monthly Booking/Renting partitions exist ahead of time
+@app.on_event("startup")
+def create_upcoming_partitions():
+    db = database.SessionLocal()
+    try:
+        if partitions.partition_functions_installed(db):
+            partitions.ensure_partitions(db)
+        else:
+            print("Skipping partition maintenance: create_stay_partitions is missing, re-run SQL/initialization.sql")
+    finally:
+        db.close()
+
+# Load the columnar room inventory used by search_rooms, and keep reloading it in the background
+@app.on_event("startup")
+def load_inventory():
+    db = database.SessionLocal()
+    try:
+        inventory.store.load(db)
+    finally:
+        db.close()
+    if inventory.INVENTORY_RELOAD_SECONDS > 0:
+        inventory.store.start_reloading(database.SessionLocal)
+
 # Dependency
 def get_db():
     db = database.SessionLocal()
@@ -26,19 +58,44 @@ def get_db():
     finally:
         db.close()
 
+# Hotels and chains are keyed by integer ids, but the API still refers to them by
+# address and chain name; resolve those once here instead of joining on strings
+def resolve_hotel_id(db: Session, hotel_address: str) -> int:
+    hotel = db.query(models.Hotel.hotelid).filter(models.Hotel.address == hotel_address).first()
+    if not hotel:
+        raise HTTPException(status_code=400, detail="Hotel not found")
+    return hotel.hotelid
+
+def resolve_chain_id(db: Session, chain_name: str) -> int:
+    chain = db.query(models.HotelChain.chainid).filter(models.HotelChain.chainname == chain_name).first()
+    if not chain:
+        raise HTTPException(status_code=400, detail="Hotel chain not found")
+    return chain.chainid
+
+# Mirrors the CHECK on Booking/Renting, so bad dates are a 400 rather than an IntegrityError
+def validate_stay_dates(startdate: datetime, enddate: datetime):
+    # e.g. an update that only changes one date, against a stored TIMESTAMPTZ
+    startdate, enddate = partitions.as_utc(startdate), partitions.as_utc(enddate)
+    if enddate < startdate:
+        raise HTTPException(status_code=400, detail="End date cannot be before start date")
+    if enddate - startdate > timedelta(days=partitions.MAX_STAY_DAYS):
+        raise HTTPException(status_code=400, detail=f"Stays cannot be longer than {partitions.MAX_STAY_DAYS} days")
+
 # Room search endpoint with multiple criteria
 @app.post("/rooms/search/", response_model=List[schemas.Room])
 def search_rooms(
     search_params: schemas.RoomSearch,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Room).join(models.Hotel)
+    # hoteladdress comes from the joined Hotel row rather than a lookup per room
+    query = db.query(models.Room).join(models.Hotel).options(contains_eager(models.Room.hotel))
     
     if search_params.start_date and search_params.end_date:
         # Exclude rooms that are already booked for the given dates
         booked_rooms = db.query(models.Room.roomnumber).join(models.Booking).filter(
             or_(
                 and_(
+                    models.Booking.startdate >= partitions.earliest_overlapping_start(search_params.start_date),
                     models.Booking.startdate <= search_params.end_date,
                     models.Booking.enddate >= search_params.start_date
                 )
@@ -46,6 +103,17 @@ def search_rooms(
         )
         query = query.filter(not_(models.Room.roomnumber.in_(booked_rooms)))
     
+    if inventory.store.loaded:
+        # Attribute filters run on the in-memory inventory; Postgres only fetches the matches
+        room_numbers = inventory.store.matching_rooms(search_params)
+        # No attribute filter excluded anything, so there is no point in sending every room number
+        room_count = inventory.store.room_count()
+        if room_count == 0 or len(room_numbers) < room_count:
+            query = query.filter(
+                models.Room.roomnumber == any_(bindparam("room_numbers", room_numbers.tolist(), type_=ARRAY(Integer)))
+            )
+        return query.all()
+    
     if search_params.capacity:
         query = query.filter(models.Room.capacity >= search_params.capacity)
     
@@ -53,7 +121,10 @@ def search_rooms(
         query = query.filter(models.Hotel.address.ilike(f"%{search_params.area}%"))
     
     if search_params.hotel_chain:
-        query = query.filter(models.Hotel.chainname == search_params.hotel_chain)
+        chain_id = db.query(models.HotelChain.chainid).filter(
+            models.HotelChain.chainname == search_params.hotel_chain
+        ).scalar_subquery()
+        query = query.filter(models.Hotel.chainid == chain_id)
     
     if search_params.hotel_rating:
         query = query.filter(models.Hotel.rating == search_params.hotel_rating)
@@ -69,6 +140,35 @@ def search_rooms(
     
     return query.all()
 
+# Evaluate many room searches (e.g. one per weekend) in one pass, one result list per search
+@app.post("/rooms/search/batch/", response_model=List[List[schemas.Room]])
+def search_rooms_batch(
+    searches: List[schemas.RoomSearch],
+    db: Session = Depends(get_db)
+):
+    if len(searches) > search.MAX_BATCH_SEARCHES:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {search.MAX_BATCH_SEARCHES} searches")
+    return search.search_rooms_batch(db, searches)
+
+# Rooms with `nights` consecutive free nights somewhere between start_date and end_date
+@app.post("/rooms/search/flexible/", response_model=List[schemas.FlexibleRoomResult])
+def search_rooms_flexible(
+    search_params: schemas.FlexibleRoomSearch,
+    db: Session = Depends(get_db)
+):
+    search_params = search_params.model_copy(update={
+        "start_date": partitions.as_utc(search_params.start_date),
+        "end_date": partitions.as_utc(search_params.end_date),
+    })
+    if search_params.end_date - search_params.start_date < timedelta(days=search_params.nights):
+        raise HTTPException(status_code=400, detail="The date window is shorter than the requested number of nights")
+    return search.search_rooms_flexible(db, search_params)
+
+# Admission control queue depth and shed counts per endpoint class
+@app.get("/admission/")
+def get_admission_stats():
+    return {name: gate.stats() for name, gate in admission.gates.items()}
+
 # View endpoints
 @app.get("/views/available-rooms-per-area/", response_model=List[schemas.AvailableRoomsPerArea])
 def get_available_rooms_per_area(db: Session = Depends(get_db)):
@@ -77,11 +177,12 @@ def get_available_rooms_per_area(db: Session = Depends(get_db)):
             SUBSTRING(Hotel.address FROM '^([^,]+)') AS area,
             COUNT(Room.roomNumber) AS available_rooms
         FROM Hotel
-        JOIN Room ON Hotel.address = Room.hotelAddress
+        JOIN Room ON Hotel.hotelID = Room.hotelID
         WHERE Room.roomNumber NOT IN (
             SELECT roomNumber 
             FROM Booking 
             WHERE CURRENT_DATE BETWEEN startDate AND endDate
+            AND startDate >= CURRENT_DATE - INTERVAL '365 days'
         )
         GROUP BY SUBSTRING(Hotel.address FROM '^([^,]+)')
     """)
@@ -93,13 +194,14 @@ def get_hotel_room_capacity(db: Session = Depends(get_db)):
     sql = text("""
         SELECT 
             Hotel.address AS hotel_address,
-            Hotel.chainName AS hotel_chain,
+            HotelChain.chainName AS hotel_chain,
             COUNT(Room.roomNumber) AS total_rooms,
             SUM(Room.capacity) AS total_capacity,
             AVG(Room.capacity)::numeric(10,2) AS average_room_capacity
         FROM Hotel
-        JOIN Room ON Hotel.address = Room.hotelAddress
-        GROUP BY Hotel.address, Hotel.chainName
+        JOIN HotelChain ON HotelChain.chainID = Hotel.chainID
+        JOIN Room ON Hotel.hotelID = Room.hotelID
+        GROUP BY Hotel.hotelID, Hotel.address, HotelChain.chainName
     """)
     result = db.execute(sql)
     return [{"hotel_address": row[0], 
@@ -116,55 +218,74 @@ def create_hotel_chain(hotel_chain: schemas.HotelChainCreate, db: Session = Depe
     db.add(db_hotel_chain)
     db.commit()
     db.refresh(db_hotel_chain)
+    inventory.store.upsert_chain(db_hotel_chain)
     return db_hotel_chain
 
-@app.get("/hotel-chains/", response_model=List[schemas.HotelChain])
-def read_hotel_chains(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.HotelChain).offset(skip).limit(limit).all()
+@app.get("/hotel-chains/", response_model=projection.list_model(schemas.HotelChain))
+def read_hotel_chains(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.HotelChain, schemas.HotelChain, params)
 
 # Hotel
 @app.post("/hotels/", response_model=schemas.Hotel)
 def create_hotel(hotel: schemas.HotelCreate, db: Session = Depends(get_db)):
-    db_hotel = models.Hotel(**hotel.dict())
+    hotel_data = hotel.dict()
+    hotel_data["chainid"] = resolve_chain_id(db, hotel_data.pop("chainname"))
+    db_hotel = models.Hotel(**hotel_data)
     db.add(db_hotel)
     db.commit()
     db.refresh(db_hotel)
+    inventory.store.upsert_hotel(db_hotel)
     return db_hotel
 
-@app.get("/hotels/", response_model=List[schemas.Hotel])
-def read_hotels(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Hotel).offset(skip).limit(limit).all()
+@app.get("/hotels/", response_model=projection.list_model(schemas.Hotel))
+def read_hotels(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Hotel, schemas.Hotel, params, joinedload(models.Hotel.chain))
+
+# A hotel with its chain, manager, rooms and staff in a fixed number of queries
+@app.get("/hotels/{hotel_address}/overview", response_model=schemas.HotelOverview)
+def read_hotel_overview(hotel_address: str, db: Session = Depends(get_db)):
+    db_hotel = db.query(models.Hotel).options(
+        joinedload(models.Hotel.chain),
+        joinedload(models.Hotel.manager),
+        selectinload(models.Hotel.rooms),
+        selectinload(models.Hotel.employees)
+    ).filter(models.Hotel.address == hotel_address).first()
+    if not db_hotel:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    return db_hotel
 
 # Room
 @app.post("/rooms/", response_model=schemas.Room)
 def create_room(room: schemas.RoomCreate, db: Session = Depends(get_db)):
-    db_room = models.Room(**room.dict())
+    room_data = room.dict()
+    room_data["hotelid"] = resolve_hotel_id(db, room_data.pop("hoteladdress"))
+    db_room = models.Room(**room_data)
     db.add(db_room)
     db.commit()
     db.refresh(db_room)
+    inventory.store.upsert_room(db_room)
     return db_room
 
-@app.get("/rooms/", response_model=List[schemas.Room])
-def read_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Room).offset(skip).limit(limit).all()
+@app.get("/rooms/", response_model=projection.list_model(schemas.Room))
+def read_rooms(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Room, schemas.Room, params, joinedload(models.Room.hotel))
 
 # Employee
 @app.post("/employees/", response_model=schemas.Employee)
 def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db)):
     # Verify hotel exists before creating employee
-    hotel = db.query(models.Hotel).filter(models.Hotel.address == employee.hotelid).first()
-    if not hotel:
-        raise HTTPException(status_code=400, detail="Hotel not found")
+    employee_data = employee.dict()
+    employee_data["hotelid"] = resolve_hotel_id(db, employee.hotelid)
     
-    db_employee = models.Employee(**employee.dict())
+    db_employee = models.Employee(**employee_data)
     db.add(db_employee)
     db.commit()
     db.refresh(db_employee)
     return db_employee
 
-@app.get("/employees/", response_model=List[schemas.Employee])
-def read_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Employee).offset(skip).limit(limit).all()
+@app.get("/employees/", response_model=projection.list_model(schemas.Employee))
+def read_employees(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Employee, schemas.Employee, params, joinedload(models.Employee.hotel))
 
 @app.put("/employees/{ssn}", response_model=schemas.Employee)
 def update_employee(ssn: str, employee: schemas.EmployeeUpdate, db: Session = Depends(get_db)):
@@ -172,17 +293,15 @@ def update_employee(ssn: str, employee: schemas.EmployeeUpdate, db: Session = De
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # If hotelid is being updated, verify it exists
-    if employee.hotelid:
-        hotel = db.query(models.Hotel).filter(models.Hotel.address == employee.hotelid).first()
-        if not hotel:
-            raise HTTPException(status_code=400, detail="Hotel not found")
-    
     # Update fields excluding SSN
     update_data = employee.dict(exclude_unset=True)
     if 'ssn' in update_data:
         del update_data['ssn']  # Don't allow SSN updates
     
+    # If hotelid is being updated, verify it exists
+    if employee.hotelid:
+        update_data['hotelid'] = resolve_hotel_id(db, employee.hotelid)
+    
     for key, value in update_data.items():
         setattr(db_employee, key, value)
     
@@ -209,18 +328,33 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
     db.refresh(db_customer)
     return db_customer
 
-@app.get("/customers/", response_model=List[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Customer).offset(skip).limit(limit).all()
+@app.get("/customers/", response_model=projection.list_model(schemas.Customer))
+def read_customers(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Customer, schemas.Customer, params)
+
+# A customer's full stay history in a fixed number of queries, however many stays it has
+@app.get("/customers/{customer_id}/history", response_model=schemas.CustomerHistory)
+def read_customer_history(customer_id: str, db: Session = Depends(get_db)):
+    db_customer = db.query(models.Customer).options(
+        selectinload(models.Customer.bookings).selectinload(models.Booking.room).joinedload(models.Room.hotel),
+        selectinload(models.Customer.bookings).selectinload(models.Booking.renting),
+        selectinload(models.Customer.rentings).selectinload(models.Renting.room).joinedload(models.Room.hotel)
+    ).filter(models.Customer.customerid == customer_id).first()
+    if not db_customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
 
 # Booking
 @app.post("/bookings/", response_model=schemas.Booking)
 def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)):
+    validate_stay_dates(booking.startdate, booking.enddate)
+    
     # Check if room is available for the given dates
     existing_booking = db.query(models.Booking).filter(
         models.Booking.roomnumber == booking.roomnumber,
         or_(
             and_(
+                models.Booking.startdate >= partitions.earliest_overlapping_start(booking.startdate),
                 models.Booking.startdate <= booking.enddate,
                 models.Booking.enddate >= booking.startdate
             )
@@ -236,22 +370,67 @@ def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)
     db.refresh(db_booking)
     return db_booking
 
-@app.get("/bookings/", response_model=List[schemas.Booking])
-def read_bookings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Booking).offset(skip).limit(limit).all()
+@app.get("/bookings/", response_model=projection.list_model(schemas.Booking))
+def read_bookings(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Booking, schemas.Booking, params)
 
 # Renting
 @app.post("/rentings/", response_model=schemas.Renting)
 def create_renting(renting: schemas.RentingCreate, db: Session = Depends(get_db)):
+    validate_stay_dates(renting.startdate, renting.enddate)
     db_renting = models.Renting(**renting.dict())
     db.add(db_renting)
     db.commit()
     db.refresh(db_renting)
     return db_renting
 
-@app.get("/rentings/", response_model=List[schemas.Renting])
-def read_rentings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Renting).offset(skip).limit(limit).all()
+@app.get("/rentings/", response_model=projection.list_model(schemas.Renting))
+def read_rentings(params: projection.ListParams = Depends(), db: Session = Depends(get_db)):
+    return projection.list_response(db, models.Renting, schemas.Renting, params)
+
+# Streaming exports of bookings/rentings starting in [start_date, end_date), as CSV
+# (gzipped unless compress=false) or Parquet
+def export_response(kind: str, start_date: datetime, end_date: datetime, format: str, compress: bool):
+    filename = f"{kind}_{start_date:%Y%m%d}_{end_date:%Y%m%d}"
+    if format == "parquet":
+        try:
+            import pyarrow
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed")
+        content = exports.stream_parquet(kind, start_date, end_date)
+        media_type = "application/vnd.apache.parquet"
+        filename += ".parquet"
+    elif compress:
+        content = exports.stream_csv(kind, start_date, end_date, compress=True)
+        media_type = "application/gzip"
+        filename += ".csv.gz"
+    else:
+        content = exports.stream_csv(kind, start_date, end_date, compress=False)
+        media_type = "text/csv"
+        filename += ".csv"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/exports/bookings/")
+def export_bookings(
+    start_date: datetime,
+    end_date: datetime,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    compress: bool = True
+):
+    return export_response("bookings", start_date, end_date, format, compress)
+
+@app.get("/exports/rentings/")
+def export_rentings(
+    start_date: datetime,
+    end_date: datetime,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    compress: bool = True
+):
+    return export_response("rentings", start_date, end_date, format, compress)
 
 # Create a schema for the convert-to-renting request
 class ConvertToRentingRequest(BaseModel):
@@ -274,6 +453,8 @@ def convert_booking_to_renting(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
+    validate_stay_dates(booking.startdate, booking.enddate)
+    
     try:
         renting = models.Renting(
             paymentinformation=convert_data.payment_info,
@@ -313,18 +494,24 @@ def update_hotel(hotel_address: str, hotel: schemas.HotelUpdate, db: Session = D
     if not db_hotel:
         raise HTTPException(status_code=404, detail="Hotel not found")
     
-    for key, value in hotel.dict(exclude_unset=True).items():
+    update_data = hotel.dict(exclude_unset=True)
+    chain_name = update_data.pop('chainname', None)
+    if chain_name:
+        update_data['chainid'] = resolve_chain_id(db, chain_name)
+    
+    for key, value in update_data.items():
         setattr(db_hotel, key, value)
     
     db.commit()
     db.refresh(db_hotel)
+    inventory.store.upsert_hotel(db_hotel)
     return db_hotel
 
 @app.put("/rooms/{room_number}/{hotel_address}", response_model=schemas.Room)
 def update_room(room_number: int, hotel_address: str, room: schemas.RoomUpdate, db: Session = Depends(get_db)):
-    db_room = db.query(models.Room).filter(
+    db_room = db.query(models.Room).join(models.Hotel).filter(
         models.Room.roomnumber == room_number,
-        models.Room.hoteladdress == hotel_address
+        models.Hotel.address == hotel_address
     ).first()
     if not db_room:
         raise HTTPException(status_code=404, detail="Room not found")
@@ -334,6 +521,7 @@ def update_room(room_number: int, hotel_address: str, room: schemas.RoomUpdate,
     
     db.commit()
     db.refresh(db_room)
+    inventory.store.upsert_room(db_room)
     return db_room
 
 @app.put("/bookings/{booking_id}", response_model=schemas.Booking)
@@ -342,7 +530,13 @@ def update_booking(booking_id: int, booking: schemas.BookingUpdate, db: Session
     if not db_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    for key, value in booking.dict(exclude_unset=True).items():
+    update_data = booking.dict(exclude_unset=True)
+    validate_stay_dates(
+        update_data.get('startdate') or db_booking.startdate,
+        update_data.get('enddate') or db_booking.enddate
+    )
+    
+    for key, value in update_data.items():
         setattr(db_booking, key, value)
     
     db.commit()
@@ -355,7 +549,13 @@ def update_renting(renting_id: int, renting: schemas.RentingUpdate, db: Session
     if not db_renting:
         raise HTTPException(status_code=404, detail="Renting not found")
     
-    for key, value in renting.dict(exclude_unset=True).items():
+    update_data = renting.dict(exclude_unset=True)
+    validate_stay_dates(
+        update_data.get('startdate') or db_renting.startdate,
+        update_data.get('enddate') or db_renting.enddate
+    )
+    
+    for key, value in update_data.items():
         setattr(db_renting, key, value)
     
     db.commit()
@@ -379,21 +579,24 @@ def delete_hotel(hotel_address: str, db: Session = Depends(get_db)):
     if not db_hotel:
         raise HTTPException(status_code=404, detail="Hotel not found")
     
+    hotel_id = db_hotel.hotelid
     db.delete(db_hotel)
     db.commit()
+    inventory.store.delete_hotel(hotel_id)
     return {"message": "Hotel deleted successfully"}
 
 @app.delete("/rooms/{room_number}/{hotel_address}")
 def delete_room(room_number: int, hotel_address: str, db: Session = Depends(get_db)):
-    db_room = db.query(models.Room).filter(
+    db_room = db.query(models.Room).join(models.Hotel).filter(
         models.Room.roomnumber == room_number,
-        models.Room.hoteladdress == hotel_address
+        models.Hotel.address == hotel_address
     ).first()
     if not db_room:
         raise HTTPException(status_code=404, detail="Room not found")
     
     db.delete(db_room)
     db.commit()
+    inventory.store.delete_room(room_number)
     return {"message": "Room deleted successfully"}
 
 @app.delete("/bookings/{booking_id}")
@@ -1,13 +1,19 @@
 from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, CheckConstraint, Text
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# Hotels and chains are keyed by integer surrogates. The address/chainname they used to be
+# keyed by stay unique, and are exposed on the referencing rows as proxies through the
+# hotel/chain relationship so the API can keep speaking in addresses and chain names.
+# Queries that return many rows load that relationship along (joinedload/contains_eager).
 class HotelChain(Base):
     __tablename__ = 'hotelchain'
     
-    chainname = Column(String(255), primary_key=True)
+    chainid = Column(Integer, primary_key=True, autoincrement=True)
+    chainname = Column(String(255), unique=True, nullable=False)
     address = Column(String(255))
     numberofhotels = Column(Integer)
     contactemail = Column(String(255))
@@ -18,18 +24,21 @@ class HotelChain(Base):
 class Hotel(Base):
     __tablename__ = 'hotel'
     
-    address = Column(String(255), primary_key=True)
+    hotelid = Column(Integer, primary_key=True, autoincrement=True)
+    address = Column(String(255), unique=True, nullable=False)
     contactemail = Column(String(255))
     phonenumber = Column(String(20))
     numberofrooms = Column(Integer)
     rating = Column(Integer)
-    chainname = Column(String(255), ForeignKey('hotelchain.chainname', ondelete='CASCADE'))
+    chainid = Column(Integer, ForeignKey('hotelchain.chainid', ondelete='CASCADE'))
     managerid = Column(Text, ForeignKey('employee.ssn', ondelete='SET NULL'), unique=True)
     
     chain = relationship("HotelChain", back_populates="hotels")
     rooms = relationship("Room", back_populates="hotel")
     employees = relationship("Employee", back_populates="hotel", foreign_keys="[Employee.hotelid]")
     manager = relationship("Employee", foreign_keys=[managerid])
+    
+    chainname = association_proxy("chain", "chainname")
 
 class Room(Base):
     __tablename__ = 'room'
@@ -41,11 +50,13 @@ class Room(Base):
     extendable = Column(Boolean)
     viewtype = Column(String(255))
     capacity = Column(Integer)
-    hoteladdress = Column(String(255), ForeignKey('hotel.address', ondelete='CASCADE'))
+    hotelid = Column(Integer, ForeignKey('hotel.hotelid', ondelete='CASCADE'))
     
     hotel = relationship("Hotel", back_populates="rooms")
     bookings = relationship("Booking", back_populates="room")
     rentings = relationship("Renting", back_populates="room")
+    
+    hoteladdress = association_proxy("hotel", "address")
 
 class Employee(Base):
     __tablename__ = 'employee'
@@ -54,10 +65,12 @@ class Employee(Base):
     fullname = Column(String(255))
     address = Column(String(255))
     jobposition = Column(String(255))
-    hotelid = Column(String(255), ForeignKey('hotel.address', ondelete='SET NULL'))
+    hotelid = Column(Integer, ForeignKey('hotel.hotelid', ondelete='SET NULL'))
     
     hotel = relationship("Hotel", back_populates="employees", foreign_keys=[hotelid])
     rentings = relationship("Renting", back_populates="employee")
+    
+    hoteladdress = association_proxy("hotel", "address")
 
 class Customer(Base):
     __tablename__ = 'customer'
@@ -67,15 +80,17 @@ class Customer(Base):
     address = Column(String(255))
     dateofregistration = Column(DateTime)
     
-    bookings = relationship("Booking", back_populates="customer")
-    rentings = relationship("Renting", back_populates="customer")
+    bookings = relationship("Booking", back_populates="customer", order_by="Booking.startdate")
+    rentings = relationship("Renting", back_populates="customer", order_by="Renting.startdate")
 
+# Booking and Renting are partitioned by startdate in Postgres, where the primary key is
+# (id, startdate). The SERIAL id stays unique across partitions, so the ORM keys on it alone.
 class Booking(Base):
     __tablename__ = 'booking'
     
     bookingid = Column(Integer, primary_key=True, autoincrement=True)
-    startdate = Column(DateTime)
-    enddate = Column(DateTime)
+    startdate = Column(DateTime, nullable=False)
+    enddate = Column(DateTime, nullable=False)
     roomnumber = Column(Integer, ForeignKey('room.roomnumber', ondelete='CASCADE'))
     customerid = Column(String(255), ForeignKey('customer.customerid', ondelete='CASCADE'))
     
@@ -88,11 +103,12 @@ class Renting(Base):
     
     rentingid = Column(Integer, primary_key=True, autoincrement=True)
     paymentinformation = Column(String(255))
-    startdate = Column(DateTime)
-    enddate = Column(DateTime)
+    startdate = Column(DateTime, nullable=False)
+    enddate = Column(DateTime, nullable=False)
     employeeid = Column(Text, ForeignKey('employee.ssn', ondelete='SET NULL'))
     customerid = Column(String(255), ForeignKey('customer.customerid', ondelete='CASCADE'))
     roomnumber = Column(Integer, ForeignKey('room.roomnumber', ondelete='CASCADE'))
+    # Enforced by triggers in the database since Booking is partitioned
     bookingid = Column(Integer, ForeignKey('booking.bookingid', ondelete='SET NULL'))
     
     employee = relationship("Employee", back_populates="rentings")
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+import os
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Booking and Renting are range-partitioned by startDate, one partition per month
+# (see SQL/initialization.sql). Stays are capped at MAX_STAY_DAYS, which lets every
+# overlap check add a lower bound on startDate so Postgres can prune old partitions.
+MAX_STAY_DAYS = 365
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 12))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", 24))
+
+def as_utc(value: datetime) -> datetime:
+    # Naive datetimes are taken as UTC, so they compare with the aware ones (e.g. "...Z")
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def earliest_overlapping_start(start_date: datetime) -> datetime:
+    # No stay that starts before this can still be running on start_date
+    return start_date - timedelta(days=MAX_STAY_DAYS)
+
+def partition_functions_installed(db: Session) -> bool:
+    # Databases initialized before partitioning have neither the functions nor partitioned tables
+    return db.execute(text("SELECT to_regproc('create_stay_partitions') IS NOT NULL")).scalar()
+
+def ensure_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    db.execute(
+        text("""
+            SELECT create_stay_partitions(
+                date_trunc('month', CURRENT_DATE)::date,
+                (CURRENT_DATE + make_interval(months => :months))::date
+            )
+        """),
+        {"months": months_ahead}
+    )
+    db.commit()
+
+def archive_partitions(db: Session, retention_months: int = PARTITION_RETENTION_MONTHS) -> list:
+    result = db.execute(
+        text("SELECT archive_stay_partitions(make_interval(months => :months))"),
+        {"months": retention_months}
+    )
+    archived = [row[0] for row in result]
+    db.commit()
+    return archived
+
+def run_maintenance():
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+        print(f"Partitions ensured {PARTITION_MONTHS_AHEAD} months ahead")
+        archived = archive_partitions(db)
+        print(f"Archived {len(archived)} partitions: {', '.join(archived) or 'none'}")
+    finally:
+        db.close()
+
+# Meant to be run periodically (e.g. daily cron): python -m app.partitions
+if __name__ == "__main__":
+    run_maintenance()
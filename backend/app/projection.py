@@ -0,0 +1,166 @@
+import functools
+import time
+from typing import Any, List, Optional, Tuple, Union
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+from sqlalchemy.ext.associationproxy import AssociationProxyInstance
+from sqlalchemy.orm import Session
+
+# Field projection for the list endpoints: `fields=a,b` selects only those columns in SQL
+# (not just in the output), and `layout=columns` returns the column names once followed
+# by one value array per column instead of a list of objects.
+
+class ListParams:
+    # Query parameters shared by every list endpoint, used as `params: ListParams = Depends()`
+    def __init__(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[str] = Query(None, description="Comma-separated field names; only these columns are selected"),
+        layout: str = Query("rows", pattern="^(rows|columns)$")
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.fields = fields
+        self.layout = layout
+
+    @property
+    def projected(self) -> bool:
+        return bool(self.fields) or self.layout == "columns"
+
+class ColumnarList(BaseModel):
+    columns: List[str]
+    data: List[List[Any]]
+
+@functools.lru_cache(maxsize=None)
+def list_model(schema):
+    # Response model for the OpenAPI docs: full rows, some fields per row, or columns
+    partial = create_model(
+        f"{schema.__name__}Fields",
+        **{name: (Optional[field.annotation], None) for name, field in schema.model_fields.items()}
+    )
+    return Union[List[schema], List[partial], ColumnarList]
+
+def projected_columns(model, schema, fields: Optional[str]) -> Tuple[list, list]:
+    # Returns the labelled columns and the relationships they need joined
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(schema.model_fields)
+    columns = []
+    joins = []
+    for name in dict.fromkeys(names):
+        field = schema.model_fields.get(name)
+        if field is None:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'")
+        # e.g. Employee.hotelid is served from the hoteladdress proxy
+        attribute = getattr(model, field.validation_alias if isinstance(field.validation_alias, str) else name)
+        if isinstance(attribute, AssociationProxyInstance):
+            # Room.hoteladdress -> Hotel.address through a join on Room.hotel
+            if attribute.local_attr not in joins:
+                joins.append(attribute.local_attr)
+            attribute = attribute.remote_attr
+        columns.append(attribute.label(name))
+    return columns, joins
+
+def columnar(names: List[str], rows: list) -> dict:
+    return {
+        "columns": names,
+        "data": [[row[index] for row in rows] for index in range(len(names))],
+    }
+
+def list_response(db: Session, model, schema, params: ListParams, *options) -> JSONResponse:
+    # Serialized here rather than by FastAPI, since the shape depends on the parameters;
+    # `options` (e.g. joinedload) only apply to full rows
+    if not params.projected:
+        rows = db.query(model).options(*options).offset(params.skip).limit(params.limit).all()
+        return JSONResponse(content=jsonable_encoder([schema.model_validate(row, from_attributes=True) for row in rows]))
+
+    columns, joins = projected_columns(model, schema, params.fields)
+    query = db.query(*columns).select_from(model)
+    for relationship in joins:
+        query = query.outerjoin(relationship)
+    rows = query.offset(params.skip).limit(params.limit).all()
+    names = [column.key for column in columns]
+    if params.layout == "columns":
+        content = columnar(names, rows)
+    else:
+        content = [dict(zip(names, row)) for row in rows]
+    return JSONResponse(content=jsonable_encoder(content))
+
+def benchmark(rooms: int = 1000, hotels: int = 200, repeat: int = 20):
+    # GET /rooms/ end to end (query, serialization, compression) for each field selection,
+    # layout and encoding, on an in-memory SQLite database filled with synthetic rooms
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from . import compression, main, models
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    BenchmarkSession = sessionmaker(bind=engine)
+
+    db = BenchmarkSession()
+    db.add(models.HotelChain(chainid=1, chainname="Chain", address="1 Chain Road", numberofhotels=hotels, contactemail="chain@example.com", phonenumber="555-0100"))
+    db.add_all(
+        models.Hotel(
+            hotelid=hotel_id, address=f"{hotel_id} Some Fairly Long Street, City", contactemail=f"hotel{hotel_id}@example.com",
+            phonenumber="555-0101", numberofrooms=rooms // hotels, rating=1 + hotel_id % 5, chainid=1
+        )
+        for hotel_id in range(1, hotels + 1)
+    )
+    db.add_all(
+        models.Room(
+            roomnumber=number, price=100.0 + number % 300,
+            amenities="TV, Wi-Fi, Mini-bar, Air conditioning, Coffee maker",
+            problems="Leaky faucet reported, awaiting maintenance" if number % 7 == 0 else "None",
+            extendable=number % 2 == 0, viewtype="sea view" if number % 3 else "mountain view",
+            capacity=1 + number % 4, hotelid=1 + number % hotels
+        )
+        for number in range(rooms)
+    )
+    db.commit()
+    db.close()
+
+    def benchmark_db():
+        session = BenchmarkSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    main.app.dependency_overrides[main.get_db] = benchmark_db
+    client = TestClient(main.app)
+    variants = {
+        "all fields, rows": {},
+        "all fields, columns": {"layout": "columns"},
+        "2 fields, rows": {"fields": "roomnumber,hoteladdress"},
+        "2 fields, columns": {"fields": "roomnumber,hoteladdress", "layout": "columns"},
+    }
+
+    baseline = None
+    print(f"GET /rooms/ for a page of {rooms} rooms")
+    try:
+        for name, variant in variants.items():
+            statements.clear()
+            client.get("/rooms/", params={**variant, "limit": rooms})
+            selected = statements[-1].split(" FROM ")[0].count(",") + 1
+            print(f"{name} ({selected} columns selected)")
+            for encoding in ("identity", "gzip", "br"):
+                if encoding == "br" and compression.brotli is None:
+                    continue
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    response = client.get("/rooms/", params={**variant, "limit": rooms}, headers={"Accept-Encoding": encoding})
+                elapsed = (time.perf_counter() - started) / repeat
+                size = response.num_bytes_downloaded
+                baseline = baseline or size
+                print(f"{encoding:>28}: {size:>8,} bytes ({size / baseline:6.1%})  {elapsed * 1000:6.2f} ms per request")
+    finally:
+        main.app.dependency_overrides.pop(main.get_db, None)
+
+# python -m app.projection
+if __name__ == "__main__":
+    benchmark()
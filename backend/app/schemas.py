@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, List
 import re
 
@@ -82,6 +82,7 @@ class RentingCreate(RentingBase):
 
 # Response schemas
 class HotelChain(HotelChainBase):
+    chainid: int
     class Config:
         from_attributes = True
 
@@ -123,6 +124,14 @@ class RoomSearch(BaseModel):
     max_price: Optional[float] = None
     view_type: Optional[str] = None
 
+# Flexible-date search: start_date/end_date bound the window, and any `nights` consecutive
+# free nights inside it match. Only the earliest start date per room unless all_start_dates.
+class FlexibleRoomSearch(RoomSearch):
+    start_date: datetime
+    end_date: datetime
+    nights: int = Field(..., ge=1)
+    all_start_dates: bool = False
+
 # View schemas
 class AvailableRoomsPerArea(BaseModel):
     area: str
@@ -154,6 +163,8 @@ class EmployeeUpdate(BaseModel):
 
 class Employee(EmployeeBase):
     ssn: str
+    # The API keeps identifying hotels by address; the row itself stores the integer hotelid
+    hotelid: str = Field(validation_alias="hoteladdress")
 
     class Config:
         orm_mode = True
@@ -214,4 +225,27 @@ class Renting(RentingBase):
     rentingid: int
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True 
+
+# Flexible search results
+class FlexibleRoomResult(BaseModel):
+    room: Room
+    start_dates: List[date]
+
+# Detail schemas (whole object graphs, loaded eagerly)
+class BookingDetail(Booking):
+    room: Room
+    renting: Optional[Renting] = None
+
+class RentingDetail(Renting):
+    room: Room
+
+class CustomerHistory(Customer):
+    bookings: List[BookingDetail]
+    rentings: List[RentingDetail]
+
+class HotelOverview(Hotel):
+    chain: HotelChain
+    manager: Optional[Employee] = None
+    rooms: List[Room]
+    employees: List[Employee]
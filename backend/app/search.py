@@ -0,0 +1,220 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import Integer, DateTime, and_, or_, column, values, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, contains_eager
+from . import models, schemas, partitions, inventory
+
+# Evaluating many RoomSearch queries at once: the attribute filters of every search run as
+# vectorized masks on the room inventory, Postgres fetches the union of the matches once
+# and matches their bookings against every date window with a second query, and each
+# search then only walks its own matches. Without a loaded inventory the candidates come
+# from one SQL query with the loosest shared filters and are matched row by row instead.
+
+MAX_BATCH_SEARCHES = int(os.getenv("MAX_BATCH_SEARCHES", 50))
+
+DateWindow = Tuple[datetime, datetime]
+
+def date_window(search_params: schemas.RoomSearch) -> Optional[DateWindow]:
+    # Normalized, so windows from searches sending "...Z" and naive dates compare and deduplicate
+    if search_params.start_date and search_params.end_date:
+        return (partitions.as_utc(search_params.start_date), partitions.as_utc(search_params.end_date))
+    return None
+
+def candidate_rooms_query(db: Session, searches: List[schemas.RoomSearch], chain_ids: Dict[str, int]):
+    # Only constrain an attribute if every search in the batch constrains it, and then by the
+    # loosest bound across the batch, so the result is a superset of every single search
+    query = db.query(models.Room, models.Hotel.rating, models.Hotel.chainid).join(models.Hotel).options(
+        contains_eager(models.Room.hotel)
+    )
+
+    if all(s.capacity for s in searches):
+        query = query.filter(models.Room.capacity >= min(s.capacity for s in searches))
+
+    if all(s.area for s in searches):
+        query = query.filter(or_(*[models.Hotel.address.ilike(f"%{area}%") for area in {s.area for s in searches}]))
+
+    if all(s.hotel_chain for s in searches):
+        query = query.filter(models.Hotel.chainid.in_({chain_ids.get(s.hotel_chain, -1) for s in searches}))
+
+    if all(s.hotel_rating for s in searches):
+        query = query.filter(models.Hotel.rating.in_({s.hotel_rating for s in searches}))
+
+    if all(s.min_price is not None for s in searches):
+        query = query.filter(models.Room.price >= min(s.min_price for s in searches))
+
+    if all(s.max_price is not None for s in searches):
+        query = query.filter(models.Room.price <= max(s.max_price for s in searches))
+
+    if all(s.view_type for s in searches):
+        query = query.filter(models.Room.viewtype.in_({s.view_type for s in searches}))
+
+    return query
+
+def booked_rooms_per_window(db: Session, room_numbers: Optional[List[int]], windows: List[DateWindow]) -> Dict[DateWindow, Set[int]]:
+    # room_numbers=None means every room
+    booked = {window: set() for window in windows}
+    if room_numbers == [] or not windows:
+        return booked
+
+    # One scan over the bookings overlapping any window, matched against all windows at once
+    window_rows = values(
+        column("windowindex", Integer), column("startdate", DateTime), column("enddate", DateTime),
+        name="windows"
+    ).data([(index, start, end) for index, (start, end) in enumerate(windows)])
+    earliest_start = min(start for start, _ in windows)
+    latest_end = max(end for _, end in windows)
+
+    overlaps = db.query(window_rows.c.windowindex, models.Booking.roomnumber).join(
+        window_rows,
+        and_(
+            models.Booking.startdate <= window_rows.c.enddate,
+            models.Booking.enddate >= window_rows.c.startdate
+        )
+    ).filter(
+        models.Booking.startdate >= partitions.earliest_overlapping_start(earliest_start),
+        models.Booking.startdate <= latest_end
+    ).distinct()
+    if room_numbers is not None:
+        overlaps = overlaps.filter(
+            models.Booking.roomnumber == any_(bindparam("booking_room_numbers", room_numbers, type_=ARRAY(Integer)))
+        )
+
+    for window_index, roomnumber in overlaps:
+        booked[windows[window_index]].add(roomnumber)
+    return booked
+
+def matches(search_params: schemas.RoomSearch, room: models.Room, rating: int, chain_id: int, chain_ids: Dict[str, int]) -> bool:
+    if search_params.capacity and room.capacity < search_params.capacity:
+        return False
+    if search_params.area and search_params.area.lower() not in room.hoteladdress.lower():
+        return False
+    if search_params.hotel_chain and chain_id != chain_ids.get(search_params.hotel_chain):
+        return False
+    if search_params.hotel_rating and rating != search_params.hotel_rating:
+        return False
+    if search_params.min_price is not None and room.price < search_params.min_price:
+        return False
+    if search_params.max_price is not None and room.price > search_params.max_price:
+        return False
+    if search_params.view_type and room.viewtype != search_params.view_type:
+        return False
+    return True
+
+def search_rooms_batch(db: Session, searches: List[schemas.RoomSearch]) -> List[List[models.Room]]:
+    if not searches:
+        return []
+    if inventory.store.loaded:
+        return search_rooms_batch_inventory(db, searches)
+
+    chain_names = {s.hotel_chain for s in searches if s.hotel_chain}
+    chain_ids = dict(
+        db.query(models.HotelChain.chainname, models.HotelChain.chainid).filter(
+            models.HotelChain.chainname.in_(chain_names)
+        ).all()
+    ) if chain_names else {}
+
+    candidates = candidate_rooms_query(db, searches, chain_ids).all()
+    windows = list({window for window in map(date_window, searches) if window})
+    booked = booked_rooms_per_window(db, [room.roomnumber for room, _, _ in candidates], windows)
+
+    results = []
+    for search_params in searches:
+        window = date_window(search_params)
+        unavailable = booked[window] if window else set()
+        results.append([
+            room for room, rating, chain_id in candidates
+            if room.roomnumber not in unavailable and matches(search_params, room, rating, chain_id, chain_ids)
+        ])
+    return results
+
+def search_rooms_batch_inventory(db: Session, searches: List[schemas.RoomSearch]) -> List[List[models.Room]]:
+    matched = [inventory.store.matching_rooms(search_params) for search_params in searches]
+    room_numbers = np.unique(np.concatenate(matched)).tolist()
+    # Like search_rooms, skip the room number list when it is every room anyway
+    room_count = inventory.store.room_count()
+    everything = room_count > 0 and len(room_numbers) == room_count
+
+    query = db.query(models.Room).join(models.Hotel).options(contains_eager(models.Room.hotel))
+    if not everything:
+        query = query.filter(
+            models.Room.roomnumber == any_(bindparam("room_numbers", room_numbers, type_=ARRAY(Integer)))
+        )
+    rooms = {room.roomnumber: room for room in query} if room_numbers else {}
+
+    windows = list({window for window in map(date_window, searches) if window})
+    booked = booked_rooms_per_window(db, None if everything else room_numbers, windows)
+
+    results = []
+    for search_params, numbers in zip(searches, matched):
+        window = date_window(search_params)
+        unavailable = booked[window] if window else set()
+        results.append([
+            rooms[roomnumber] for roomnumber in numbers.tolist()
+            if roomnumber not in unavailable and roomnumber in rooms
+        ])
+    return results
+
+# Flexible-date search: for each candidate room, one ordered sweep over its bookings and
+# rentings finds the gaps that fit `nights` consecutive nights inside the window.
+
+def free_start_dates(stays: List[Tuple[date, date]], window_start: date, window_end: date, nights: int, first_only: bool) -> List[date]:
+    # A stay starting on `start` overlaps [stay_start, stay_end] unless it ends before
+    # stay_start or starts after stay_end; both ends inclusive, like create_booking's check
+    length = timedelta(days=nights)
+    last_start = window_end - length
+    start_dates = []
+    free_from = window_start
+    for stay_start, stay_end in stays + [(last_start + length + timedelta(days=1), None)]:
+        gap_end = min(stay_start - length - timedelta(days=1), last_start)
+        while free_from <= gap_end:
+            start_dates.append(free_from)
+            if first_only:
+                return start_dates
+            free_from += timedelta(days=1)
+        if stay_end is not None:
+            free_from = max(free_from, stay_end + timedelta(days=1))
+    return start_dates
+
+def search_rooms_flexible(db: Session, search_params: schemas.FlexibleRoomSearch) -> List[dict]:
+    chain_ids = dict(
+        db.query(models.HotelChain.chainname, models.HotelChain.chainid).filter(
+            models.HotelChain.chainname == search_params.hotel_chain
+        ).all()
+    ) if search_params.hotel_chain else {}
+    candidates = [room for room, _, _ in candidate_rooms_query(db, [search_params], chain_ids)]
+    if not candidates:
+        return []
+
+    # One array parameter shared by both branches, however many candidates there are
+    room_numbers = bindparam("room_numbers", [room.roomnumber for room in candidates], type_=ARRAY(Integer))
+
+    def overlapping(stay):
+        return db.query(stay.roomnumber, stay.startdate, stay.enddate).filter(
+            stay.roomnumber == any_(room_numbers),
+            stay.startdate >= partitions.earliest_overlapping_start(search_params.start_date),
+            stay.startdate <= search_params.end_date,
+            stay.enddate >= search_params.start_date
+        )
+
+    stays = overlapping(models.Booking).union_all(overlapping(models.Renting)).order_by(
+        models.Booking.roomnumber, models.Booking.startdate
+    )
+    stays_by_room = {}
+    for roomnumber, stay_start, stay_end in stays:
+        stays_by_room.setdefault(roomnumber, []).append((stay_start.date(), stay_end.date()))
+
+    results = []
+    for room in candidates:
+        start_dates = free_start_dates(
+            stays_by_room.get(room.roomnumber, []),
+            search_params.start_date.date(),
+            search_params.end_date.date(),
+            search_params.nights,
+            first_only=not search_params.all_start_dates
+        )
+        if start_dates:
+            results.append({"room": room, "start_dates": start_dates})
+    return results
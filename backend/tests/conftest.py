@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import main, models
+
+# The app against a fresh in-memory SQLite database; startup events (partitions, inventory)
+# only run inside `with TestClient(...)`, so they never touch Postgres here.
+
+class TestApp:
+    def __init__(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        models.Base.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Every SQL statement sent to the database, in order
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda conn, cursor, statement, *args: self.statements.append(statement))
+        self.client = TestClient(main.app)
+
+    def get_db(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+@pytest.fixture
+def make_app():
+    # Each call gives a new database and points the app's get_db at it
+    def make() -> TestApp:
+        test_app = TestApp()
+        main.app.dependency_overrides[main.get_db] = test_app.get_db
+        return test_app
+
+    yield make
+    main.app.dependency_overrides.pop(main.get_db, None)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import pytest
+from app import models
+
+# The detail endpoints load their whole object graph eagerly, so the number of queries
+# they send must not grow with the number of stays, rooms or employees.
+
+HOTELS = 3
+
+def seed(db, size: int):
+    db.add(models.HotelChain(
+        chainid=1, chainname="Chain", address="1 Chain Road", numberofhotels=HOTELS,
+        contactemail="chain@example.com", phonenumber="555-0100"
+    ))
+    for hotel_id in range(1, HOTELS + 1):
+        db.add(models.Hotel(
+            hotelid=hotel_id, address=f"{hotel_id} Main St, City", contactemail=f"hotel{hotel_id}@example.com",
+            phonenumber="555-0101", numberofrooms=size, rating=3, chainid=1
+        ))
+    # Bookings and rentings use different rooms, so neither can be served from the identity map
+    for number in range(1, 2 * size + 1):
+        db.add(models.Room(
+            roomnumber=number, price=100.0, amenities="TV", problems=None, extendable=False,
+            viewtype="sea view", capacity=2, hotelid=1 + number % HOTELS
+        ))
+    for number in range(1, size + 1):
+        db.add(models.Employee(
+            ssn=f"{number:09d}", fullname=f"Employee {number}", address="Staff St",
+            jobposition="Receptionist", hotelid=1 + number % HOTELS
+        ))
+    db.add(models.Customer(customerid="c1", fullname="Customer", address="Guest St"))
+    db.flush()
+    db.get(models.Hotel, 1).managerid = f"{HOTELS:09d}"
+
+    start = datetime(2026, 1, 1)
+    for number in range(1, size + 1):
+        stay_start = start + timedelta(days=3 * number)
+        booking = models.Booking(
+            bookingid=number, startdate=stay_start, enddate=stay_start + timedelta(days=2),
+            roomnumber=number, customerid="c1"
+        )
+        db.add(booking)
+        db.add(models.Renting(
+            rentingid=number, paymentinformation="card", startdate=stay_start, enddate=stay_start + timedelta(days=2),
+            employeeid=f"{number:09d}", customerid="c1", roomnumber=size + number,
+            bookingid=number if number % 2 else None
+        ))
+    db.commit()
+
+def get_counting_queries(test_app, path: str):
+    test_app.statements.clear()
+    response = test_app.client.get(path)
+    assert response.status_code == 200
+    return len(test_app.statements), response.json()
+
+def seeded_app(make_app, size: int):
+    test_app = make_app()
+    db = test_app.session_factory()
+    seed(db, size)
+    db.close()
+    return test_app
+
+@pytest.mark.parametrize("path", ["/customers/c1/history", "/hotels/1 Main St, City/overview"])
+def test_query_count_is_constant(make_app, path):
+    small, _ = get_counting_queries(seeded_app(make_app, 3), path)
+    large, _ = get_counting_queries(seeded_app(make_app, 60), path)
+    assert small == large
+
+def test_customer_history_contents(make_app):
+    _, history = get_counting_queries(seeded_app(make_app, 10), "/customers/c1/history")
+    assert len(history["bookings"]) == 10
+    assert len(history["rentings"]) == 10
+    assert history["bookings"][0]["room"]["hoteladdress"] == "2 Main St, City"
+    assert history["bookings"][0]["renting"]["rentingid"] == 1
+    assert history["bookings"][1]["renting"] is None
+
+def test_hotel_overview_contents(make_app):
+    _, overview = get_counting_queries(seeded_app(make_app, 9), "/hotels/1 Main St, City/overview")
+    assert overview["chain"]["chainname"] == "Chain"
+    assert overview["manager"]["ssn"] == f"{HOTELS:09d}"
+    assert len(overview["rooms"]) == 6
+    assert len(overview["employees"]) == 3
+    assert all(room["hoteladdress"] == "1 Main St, City" for room in overview["rooms"])
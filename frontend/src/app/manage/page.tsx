@@ -103,7 +103,7 @@ export default function ManagePage() {
 
   const fetchHotels = async () => {
     try {
-      const fetchedHotels = await getHotels();
+      const fetchedHotels = await getHotels(['address']);
       setHotels(fetchedHotels);
     } catch (error) {
       console.error('Error fetching hotels:', error);
@@ -14,7 +14,7 @@ export default function RoomSearch() {
   useEffect(() => {
     const fetchHotelChains = async () => {
       try {
-        const chains = await getHotelChains();
+        const chains = await getHotelChains(['chainname']);
         setHotelChains(chains);
       } catch (error) {
         console.error('Error fetching hotel chains:', error);
@@ -13,6 +13,16 @@ export const searchRooms = async (params: RoomSearch) => {
     return response.data;
 };
 
+export const searchRoomsBatch = async (searches: RoomSearch[]) => {
+    const response = await api.post('/rooms/search/batch/', searches);
+    return response.data;
+};
+
+export const searchRoomsFlexible = async (params: RoomSearch & { nights: number; all_start_dates?: boolean }) => {
+    const response = await api.post('/rooms/search/flexible/', params);
+    return response.data;
+};
+
 export const getRooms = async () => {
     const response = await api.get('/rooms');
     return response.data;
@@ -24,14 +34,15 @@ export const createRoom = async (roomData: Room) => {
 };
 
 // Hotel Chain related endpoints
-export const getHotelChains = async () => {
-    const response = await api.get('/hotel-chains');
+// Pass `fields` to fetch only those columns (e.g. for dropdowns)
+export const getHotelChains = async (fields?: string[]) => {
+    const response = await api.get('/hotel-chains', { params: fields ? { fields: fields.join(',') } : undefined });
     return response.data;
 };
 
 // Hotel related endpoints
-export const getHotels = async () => {
-    const response = await api.get('/hotels');
+export const getHotels = async (fields?: string[]) => {
+    const response = await api.get('/hotels', { params: fields ? { fields: fields.join(',') } : undefined });
     return response.data;
 };
 